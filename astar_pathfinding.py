@@ -4,28 +4,81 @@ A*尋路演算法模組
 """
 
 import math
+import copy
 import heapq
-from typing import List, Tuple, Optional, Set
+import itertools
+from array import array
+from bisect import bisect_right
+from typing import List, Tuple, Optional, Set, Dict
 from logger_utils import logger
 
-
-class Node:
-    """A*演算法節點"""
-    def __init__(self, position: Tuple[int, int], parent=None):
-        self.position = position
-        self.parent = parent
-        self.g = 0  # 從起點到當前節點的實際成本
-        self.h = 0  # 從當前節點到終點的啟發式估計成本
-        self.f = 0  # f = g + h
-
-    def __eq__(self, other):
-        return self.position == other.position
-
-    def __lt__(self, other):
-        return self.f < other.f
-
-    def __hash__(self):
-        return hash(self.position)
+# 移動成本放大1000倍以整數運算（對角線 sqrt(2) ≈ 1.414）
+STRAIGHT_COST = 1000
+DIAGONAL_COST = 1414
+
+# 鄰居偏移與單步成本 (dy, dx, cost)：前四個為直向，後四個為對角線
+_DIRS8 = ((0, 1, STRAIGHT_COST), (1, 0, STRAIGHT_COST),
+          (0, -1, STRAIGHT_COST), (-1, 0, STRAIGHT_COST),
+          (1, 1, DIAGONAL_COST), (1, -1, DIAGONAL_COST),
+          (-1, 1, DIAGONAL_COST), (-1, -1, DIAGONAL_COST))
+_DIRS4 = _DIRS8[:4]
+
+# 柵格格數上限：作業範圍大時放大解析度，避免柵格記憶體與標記成本隨範圍暴增
+GRID_MAX_CELLS = 4_000_000
+
+
+def _polygon_band_spans(polygon: List[Tuple[float, float]], lats: List[float],
+                        lons: List[float]) -> List[Tuple[int, list]]:
+    """
+    計算多邊形在各列覆蓋的柵格區段
+
+    先以邊表把每條邊的交點直接寫入其緯度範圍涵蓋的各列，
+    只計算真正存在的交點，不必逐列掃過所有邊；水平邊直接略過。
+
+    Args:
+        polygon: 多邊形頂點 (lat, lon)
+        lats: 各列的緯度
+        lons: 各欄的經度
+
+    Returns:
+        [(grid_y, [(x0, x1), ...]), ...]，依grid_y遞增
+    """
+    # 邊表：每條邊只對緯度在半開區間 (lo, hi] 內的列產生交點（避免頂點重複計數）
+    row_crossings = {}
+    p1_lat, p1_lon = polygon[-1]
+    for p2_lat, p2_lon in polygon:
+        if p1_lat != p2_lat:
+            slope = (p2_lon - p1_lon) / (p2_lat - p1_lat)
+            if p1_lat < p2_lat:
+                y0, y1 = bisect_right(lats, p1_lat), bisect_right(lats, p2_lat)
+            else:
+                y0, y1 = bisect_right(lats, p2_lat), bisect_right(lats, p1_lat)
+            for y in range(y0, y1):
+                crossing = (lats[y] - p1_lat) * slope + p1_lon
+                crossings = row_crossings.get(y)
+                if crossings is None:
+                    row_crossings[y] = [crossing]
+                else:
+                    crossings.append(crossing)
+        p1_lat, p1_lon = p2_lat, p2_lon
+
+    band = []
+    for y in sorted(row_crossings):
+        crossings = row_crossings[y]
+        if len(crossings) < 2:
+            continue
+
+        crossings.sort()
+        spans = []
+        for i in range(0, len(crossings) - 1, 2):
+            x0 = bisect_right(lons, crossings[i])
+            x1 = bisect_right(lons, crossings[i + 1])
+            if x0 < x1:
+                spans.append((x0, x1))
+
+        if spans:
+            band.append((y, spans))
+    return band
 
 
 class GridMap:
@@ -58,83 +111,111 @@ class GridMap:
         self.grid_height = max(10, int(lat_meters / resolution))
         self.grid_width = max(10, int(lon_meters / resolution))
 
-        # 創建柵格（False=可通行, True=障礙物）
-        self.grid = [[False for _ in range(self.grid_width)]
-                     for _ in range(self.grid_height)]
+        # 預先計算座標轉換係數，避免每次轉換重複做除法
+        self._lat_scale = lat_range / (self.grid_height - 1)
+        self._lon_scale = lon_range / (self.grid_width - 1)
+        self._inv_lat_scale = (self.grid_height - 1) / lat_range
+        self._inv_lon_scale = (self.grid_width - 1) / lon_range
+
+        # 創建柵格（0=可通行, 1=障礙物）
+        # 每列為bytearray：每格1位元組，整段標記可直接做切片賦值
+        self.grid = [bytearray(self.grid_width) for _ in range(self.grid_height)]
+        # 柵格版本號：每次標記障礙/邊界時遞增，供快取判斷是否失效
+        self.version = 0
+
+        logger.info("柵格地圖創建: %dx%d (解析度:%sm)",
+                    self.grid_width, self.grid_height, resolution)
+
+    @staticmethod
+    def resolution_for_bounds(bounds: Tuple[float, float, float, float],
+                              min_resolution: float = 0.5,
+                              max_cells: int = GRID_MAX_CELLS) -> float:
+        """
+        依地圖範圍決定柵格解析度
+
+        範圍小時使用min_resolution；格數會超過max_cells時放大解析度，
+        使柵格總格數約等於max_cells。
+        """
+        min_lat, max_lat, min_lon, max_lon = bounds
+        cos_lat = math.cos(math.radians((min_lat + max_lat) / 2))
+        lat_meters = (max_lat - min_lat) * 111111.0
+        lon_meters = (max_lon - min_lon) * 111111.0 * cos_lat
 
-        logger.info(f"柵格地圖創建: {self.grid_width}x{self.grid_height} "
-                   f"(解析度:{resolution}m)")
+        area = lat_meters * lon_meters
+        if area <= min_resolution * min_resolution * max_cells:
+            return min_resolution
+        return math.sqrt(area / max_cells)
 
     def latlon_to_grid(self, lat: float, lon: float) -> Tuple[int, int]:
-        """將經緯度轉換為柵格座標"""
-        # 正規化到[0,1]
-        norm_lat = (lat - self.min_lat) / (self.max_lat - self.min_lat)
-        norm_lon = (lon - self.min_lon) / (self.max_lon - self.min_lon)
-
-        # 轉換為柵格座標
-        grid_y = int(norm_lat * (self.grid_height - 1))
-        grid_x = int(norm_lon * (self.grid_width - 1))
+        """將經緯度轉換為柵格座標（取最近的柵格取樣點）"""
+        # 四捨五入：grid_to_latlon 的結果必須能轉回同一格
+        grid_y = int((lat - self.min_lat) * self._inv_lat_scale + 0.5)
+        grid_x = int((lon - self.min_lon) * self._inv_lon_scale + 0.5)
 
         # 確保在範圍內
-        grid_y = max(0, min(self.grid_height - 1, grid_y))
-        grid_x = max(0, min(self.grid_width - 1, grid_x))
+        if grid_y < 0:
+            grid_y = 0
+        elif grid_y >= self.grid_height:
+            grid_y = self.grid_height - 1
+        if grid_x < 0:
+            grid_x = 0
+        elif grid_x >= self.grid_width:
+            grid_x = self.grid_width - 1
 
         return (grid_y, grid_x)
 
     def grid_to_latlon(self, grid_y: int, grid_x: int) -> Tuple[float, float]:
         """將柵格座標轉換為經緯度"""
-        # 正規化到[0,1]
-        norm_lat = grid_y / (self.grid_height - 1)
-        norm_lon = grid_x / (self.grid_width - 1)
-
-        # 轉換為經緯度
-        lat = self.min_lat + norm_lat * (self.max_lat - self.min_lat)
-        lon = self.min_lon + norm_lon * (self.max_lon - self.min_lon)
-
-        return (lat, lon)
+        return (self.min_lat + grid_y * self._lat_scale,
+                self.min_lon + grid_x * self._lon_scale)
 
     def mark_obstacle(self, polygon: List[Tuple[float, float]],
                       safe_distance: float = 0):
         """標記障礙物區域"""
         # 如果有安全距離，先擴展多邊形（這部分由外部處理）
-        # 遍歷柵格，檢查每個柵格中心是否在障礙物內
-        for y in range(self.grid_height):
-            for x in range(self.grid_width):
-                lat, lon = self.grid_to_latlon(y, x)
-                if self._point_in_polygon((lat, lon), polygon):
-                    self.grid[y][x] = True
+        self.version += 1
+        # 掃描線填充：每列只計算一次與多邊形邊的交點，再整段標記
+        for y, spans in self._polygon_row_spans(polygon):
+            row = self.grid[y]
+            for x0, x1 in spans:
+                row[x0:x1] = b'\x01' * (x1 - x0)
 
     def mark_boundary(self, boundary: List[Tuple[float, float]], invert: bool = True):
         """標記作業邊界（邊界外為障礙）"""
+        if not invert:
+            return
+
+        self.version += 1
+        # 邊界外視為障礙：先整列設為障礙，再清除邊界內的區段
+        # 預先寫入柵格而非在is_valid中延遲做射線法：A*與視線檢查直接讀取柵格位元組，
+        # 逐格射線法的成本遠高於此處以切片賦值完成的整張填充
+        blocked_row = b'\x01' * self.grid_width
         for y in range(self.grid_height):
-            for x in range(self.grid_width):
-                lat, lon = self.grid_to_latlon(y, x)
-                is_inside = self._point_in_polygon((lat, lon), boundary)
-
-                if invert:
-                    # 邊界外視為障礙
-                    self.grid[y][x] = not is_inside
-
-    def _point_in_polygon(self, point: Tuple[float, float],
-                          polygon: List[Tuple[float, float]]) -> bool:
-        """射線法判斷點是否在多邊形內"""
-        lat, lon = point
-        n = len(polygon)
-        inside = False
-
-        p1_lat, p1_lon = polygon[0]
-        for i in range(1, n + 1):
-            p2_lat, p2_lon = polygon[i % n]
-            if lon > min(p1_lon, p2_lon):
-                if lon <= max(p1_lon, p2_lon):
-                    if lat <= max(p1_lat, p2_lat):
-                        if p1_lon != p2_lon:
-                            xinters = (lon - p1_lon) * (p2_lat - p1_lat) / (p2_lon - p1_lon) + p1_lat
-                        if p1_lat == p2_lat or lat <= xinters:
-                            inside = not inside
-            p1_lat, p1_lon = p2_lat, p2_lon
-
-        return inside
+            self.grid[y] = bytearray(blocked_row)
+        for y, spans in self._polygon_row_spans(boundary):
+            row = self.grid[y]
+            for x0, x1 in spans:
+                row[x0:x1] = bytes(x1 - x0)
+
+    def _polygon_row_spans(self, polygon: List[Tuple[float, float]]):
+        """
+        掃描線法計算多邊形在每一列覆蓋的柵格區段
+
+        對每一列(固定緯度)求出與多邊形各邊的經度交點，依奇偶規則
+        取得 [x0, x1) 區段。以 bisect 在柵格中心經度上定位，避免逐格判斷。
+
+        Yields:
+            (grid_y, [(x0, x1), ...])
+        """
+        if len(polygon) < 3:
+            return
+
+        min_lat, lat_scale = self.min_lat, self._lat_scale
+        min_lon, lon_scale = self.min_lon, self._lon_scale
+        lats = [min_lat + y * lat_scale for y in range(self.grid_height)]
+        lons = [min_lon + x * lon_scale for x in range(self.grid_width)]
+
+        yield from _polygon_band_spans(polygon, lats, lons)
 
     def is_valid(self, grid_y: int, grid_x: int) -> bool:
         """檢查柵格座標是否有效且可通行"""
@@ -168,140 +249,378 @@ class AStarPathfinder:
         # 轉換為柵格座標
         start_grid = self.grid_map.latlon_to_grid(*start_latlon)
         end_grid = self.grid_map.latlon_to_grid(*end_latlon)
+        return self._find_grid_path(start_grid, end_grid, start_latlon, end_latlon, allow_diagonal)
+
+    def find_detour(self, start_latlon: Tuple[float, float],
+                    end_latlon: Tuple[float, float],
+                    allow_diagonal: bool = True) -> Tuple[Optional[List[Tuple[float, float]]], bool]:
+        """
+        檢查兩點間直線是否受阻，受阻時以A*尋找繞行路徑
 
+        柵格座標只轉換一次，直線檢查與A*搜尋共用。
+
+        Returns:
+            (路徑, 是否為暢通直線)；直線暢通時路徑為None，
+            受阻時路徑同find_path（找不到則為None）
+        """
+        start_grid = self.grid_map.latlon_to_grid(*start_latlon)
+        end_grid = self.grid_map.latlon_to_grid(*end_latlon)
+
+        if not self._bresenham_any_blocked(start_grid, end_grid):
+            return None, True
+
+        return self._find_grid_path(start_grid, end_grid, start_latlon, end_latlon, allow_diagonal), False
+
+    def _find_grid_path(self, start_grid: Tuple[int, int], end_grid: Tuple[int, int],
+                        start_latlon: Tuple[float, float], end_latlon: Tuple[float, float],
+                        allow_diagonal: bool) -> Optional[List[Tuple[float, float]]]:
+        """以已轉換的柵格起終點執行A*，返回平滑後的經緯度路徑"""
         # 檢查起點和終點是否有效
         if not self.grid_map.is_valid(*start_grid):
-            logger.warning(f"起點在障礙物內: {start_latlon}")
+            logger.warning("起點在障礙物內: %s", start_latlon)
             # 嘗試找到最近的有效點
             start_grid = self._find_nearest_valid_point(start_grid)
             if start_grid is None:
                 return None
 
         if not self.grid_map.is_valid(*end_grid):
-            logger.warning(f"終點在障礙物內: {end_latlon}")
+            logger.warning("終點在障礙物內: %s", end_latlon)
             end_grid = self._find_nearest_valid_point(end_grid)
             if end_grid is None:
                 return None
 
-        # 創建起始和目標節點
-        start_node = Node(start_grid)
-        end_node = Node(end_grid)
+        # 執行A*搜尋（以整數柵格座標運算）
+        path = self._search([start_grid], end_grid, allow_diagonal)
 
-        # 初始化開放列表和關閉集合
-        open_list = []
-        heapq.heappush(open_list, start_node)
-        closed_set: Set[Tuple[int, int]] = set()
+        if path is None:
+            # 找不到路徑
+            logger.warning("A*找不到路徑: %s -> %s", start_latlon, end_latlon)
+            return None
+
+        # 轉換為經緯度
+        latlon_path = [self.grid_map.grid_to_latlon(y, x) for y, x in path]
+        # 路徑平滑
+        smoothed_path = self._smooth_path(latlon_path)
+        logger.info("A*找到路徑: %d格 -> %d點", len(path), len(smoothed_path))
+        return smoothed_path
+
+    def _search(self, starts: List[Tuple[int, int]], goal: Tuple[int, int],
+                allow_diagonal: bool) -> Optional[List[Tuple[int, int]]]:
+        """
+        A*主循環 - 直接在柵格上以整數座標運算
+
+        不建立節點物件：開放列表存放整數 (f, tie, g, y, x) tuple，
+        成本放大1000倍以整數比較。節點狀態以攤平索引 y*W+x 存於連續陣列
+        （關閉旗標bytearray、g值與父節點索引array），不再以座標tuple為鍵雜湊。
+        f相同時以遞減計數器tie決勝（後入列者優先），比較永遠不會落到座標上。
+        允許對角線時以跳點搜尋(Jump Point Search)產生後繼節點，
+        返回的路徑只包含跳點（相鄰跳點間為直線或45度斜線）。
 
-        # 存儲每個節點的最佳g值
-        g_scores = {start_grid: 0}
+        Args:
+            starts: 起點柵格座標列表（多起點時一次heapify建立開放列表）
+            goal: 終點柵格座標
+            allow_diagonal: 是否允許對角線移動
+
+        Returns:
+            柵格座標路徑（含起終點），找不到時返回None
+        """
+        heappush = heapq.heappush
+        heappop = heapq.heappop
+        get_neighbors = self._get_neighbors
+        jump_successors = self._jump_successors
+        heuristic = self._heuristic
+
+        tie = itertools.count(0, -1)
+        width = self.grid_map.grid_width
+        size = self.grid_map.grid_height * width
+
+        # 初始化開放列表和關閉旗標（多起點以heapify一次建堆）
+        open_list = [(heuristic(start, goal), next(tie), 0, start[0], start[1])
+                     for start in starts]
+        heapq.heapify(open_list)
+        closed = bytearray(size)
+
+        # 存儲每個節點的最佳g值和父節點索引（-1表示未到達/無父節點）
+        g_scores = array('i', [-1]) * size
+        parents = array('i', [-1]) * size
+        for y, x in starts:
+            g_scores[y * width + x] = 0
+        goal_idx = goal[0] * width + goal[1]
 
-        # A*主循環
         while open_list:
             # 取出f值最小的節點
-            current_node = heapq.heappop(open_list)
-
-            # 如果到達目標
-            if current_node.position == end_node.position:
-                path = self._reconstruct_path(current_node)
-                # 轉換為經緯度
-                latlon_path = [self.grid_map.grid_to_latlon(y, x)
-                              for y, x in path]
-                # 路徑平滑
-                smoothed_path = self._smooth_path(latlon_path)
-                logger.info(f"A*找到路徑: {len(path)}格 -> {len(smoothed_path)}點")
-                return smoothed_path
-
-            # 添加到關閉集合
-            closed_set.add(current_node.position)
+            _, _, g, y, x = heappop(open_list)
+            idx = y * width + x
+
+            # 如果到達目標，沿父節點索引回溯路徑
+            if idx == goal_idx:
+                path = []
+                while idx != -1:
+                    path.append(divmod(idx, width))
+                    idx = parents[idx]
+                path.reverse()
+                return path
+
+            # 同一節點可能以較差的g值重複入列，已關閉則跳過
+            if closed[idx]:
+                continue
+            closed[idx] = 1
+
+            # 八方向使用跳點搜尋(JPS)只展開跳點，四方向維持逐格展開
+            if allow_diagonal:
+                parent = parents[idx]
+                neighbors = jump_successors(
+                    y, x, divmod(parent, width) if parent >= 0 else None, goal)
+            else:
+                neighbors = get_neighbors(y, x, False)
 
             # 檢查所有鄰居
-            neighbors = self._get_neighbors(current_node, allow_diagonal)
-
-            for neighbor in neighbors:
-                if neighbor.position in closed_set:
+            for ny, nx, step_cost in neighbors:
+                nidx = ny * width + nx
+                if closed[nidx]:
                     continue
 
                 # 計算新的g值
-                tentative_g = current_node.g + self._distance(
-                    current_node.position, neighbor.position
-                )
+                tentative_g = g + step_cost
 
                 # 如果找到更好的路徑
-                if neighbor.position not in g_scores or tentative_g < g_scores[neighbor.position]:
-                    neighbor.parent = current_node
-                    neighbor.g = tentative_g
-                    neighbor.h = self._heuristic(neighbor.position, end_node.position)
-                    neighbor.f = neighbor.g + neighbor.h
+                best_g = g_scores[nidx]
+                if best_g < 0 or tentative_g < best_g:
+                    g_scores[nidx] = tentative_g
+                    parents[nidx] = idx
+                    f = tentative_g + heuristic((ny, nx), goal)
+                    heappush(open_list, (f, next(tie), tentative_g, ny, nx))
 
-                    g_scores[neighbor.position] = tentative_g
-                    heapq.heappush(open_list, neighbor)
-
-        # 找不到路徑
-        logger.warning(f"A*找不到路徑: {start_latlon} -> {end_latlon}")
         return None
 
     def _find_nearest_valid_point(self, grid_pos: Tuple[int, int],
                                    max_search_radius: int = 20) -> Optional[Tuple[int, int]]:
-        """找到最近的有效點"""
+        """
+        找到最近的有效點（歐幾里得距離最近）
+
+        逐圈只走訪方環的外框格子；找到第一個候選點後，
+        繼續檢查半徑仍小於目前最佳距離的外圈，確保結果為真正最近點。
+        """
         y, x = grid_pos
+        is_valid = self.grid_map.is_valid
+
+        best = None
+        best_d2 = None
 
         for radius in range(1, max_search_radius):
-            for dy in range(-radius, radius + 1):
-                for dx in range(-radius, radius + 1):
-                    if abs(dy) == radius or abs(dx) == radius:
-                        ny, nx = y + dy, x + dx
-                        if self.grid_map.is_valid(ny, nx):
-                            return (ny, nx)
+            if best_d2 is not None and radius * radius >= best_d2:
+                break
 
-        return None
+            # 上下兩列（含四角）與左右兩行（不含四角）
+            ring = [(dy, dx) for dy in (-radius, radius)
+                    for dx in range(-radius, radius + 1)]
+            ring.extend((dy, dx) for dx in (-radius, radius)
+                        for dy in range(-radius + 1, radius))
 
-    def _get_neighbors(self, node: Node, allow_diagonal: bool) -> List[Node]:
-        """獲取鄰居節點"""
-        y, x = node.position
+            for dy, dx in ring:
+                d2 = dy * dy + dx * dx
+                if best_d2 is not None and d2 >= best_d2:
+                    continue
+                if is_valid(y + dy, x + dx):
+                    best = (y + dy, x + dx)
+                    best_d2 = d2
+
+        return best
+
+    def _get_neighbors(self, y: int, x: int,
+                       allow_diagonal: bool) -> List[Tuple[int, int, int]]:
+        """獲取鄰居 (y, x, 單步成本)（直接讀取柵格，不經is_valid）"""
+        grid = self.grid_map.grid
+        height = self.grid_map.grid_height
+        width = self.grid_map.grid_width
         neighbors = []
 
-        # 四個方向
-        directions = [(0, 1), (1, 0), (0, -1), (-1, 0)]
-
-        # 如果允許對角線，添加四個對角方向
-        if allow_diagonal:
-            directions.extend([(1, 1), (1, -1), (-1, 1), (-1, -1)])
-
-        for dy, dx in directions:
+        for dy, dx, cost in (_DIRS8 if allow_diagonal else _DIRS4):
             ny, nx = y + dy, x + dx
 
-            if self.grid_map.is_valid(ny, nx):
+            if 0 <= ny < height and 0 <= nx < width and not grid[ny][nx]:
                 # 如果是對角線移動，檢查兩個相鄰格子是否都可通行（避免穿牆）
-                if allow_diagonal and abs(dy) == 1 and abs(dx) == 1:
-                    if not (self.grid_map.is_valid(y + dy, x) and
-                           self.grid_map.is_valid(y, x + dx)):
-                        continue
+                if dy and dx and (grid[ny][x] or grid[y][nx]):
+                    continue
 
-                neighbor = Node((ny, nx), node)
-                neighbors.append(neighbor)
+                neighbors.append((ny, nx, cost))
 
         return neighbors
 
-    def _heuristic(self, pos1: Tuple[int, int], pos2: Tuple[int, int]) -> float:
-        """啟發式函數（歐幾里得距離）"""
-        dy = pos2[0] - pos1[0]
-        dx = pos2[1] - pos1[1]
-        return math.sqrt(dx * dx + dy * dy)
+    def _jump_successors(self, y: int, x: int,
+                         parent: Optional[Tuple[int, int]],
+                         goal: Tuple[int, int]) -> List[Tuple[int, int, int]]:
+        """
+        跳點搜尋的後繼節點 (y, x, 成本)
 
-    def _distance(self, pos1: Tuple[int, int], pos2: Tuple[int, int]) -> float:
-        """計算兩點間距離"""
-        dy = pos2[0] - pos1[0]
-        dx = pos2[1] - pos1[1]
-        # 對角線移動成本為sqrt(2)，直線為1
-        return math.sqrt(dx * dx + dy * dy)
+        依來向剪枝鄰居，再沿每個方向跳躍到下一個跳點。
+        對角線移動需兩側直向格子皆可通行（與_get_neighbors相同，不穿牆）。
+        跳點與目前節點在同一直線或45度斜線上，成本為單步成本乘以格數。
+        """
+        if parent is None:
+            # 起點：展開所有可通行鄰居
+            directions = [(ny - y, nx - x)
+                          for ny, nx, _ in self._get_neighbors(y, x, True)]
+        else:
+            dy = (y > parent[0]) - (y < parent[0])
+            dx = (x > parent[1]) - (x < parent[1])
+            directions = self._pruned_directions(y, x, dy, dx)
+
+        successors = []
+        for dy, dx in directions:
+            point = self._jump(y + dy, x + dx, dy, dx, goal)
+            if point is not None:
+                jy, jx = point
+                steps = abs(jy - y) or abs(jx - x)
+                cost = DIAGONAL_COST if dy and dx else STRAIGHT_COST
+                successors.append((jy, jx, cost * steps))
+        return successors
+
+    def _pruned_directions(self, y: int, x: int,
+                           dy: int, dx: int) -> List[Tuple[int, int]]:
+        """依來向(dy, dx)取得需要探索的方向（含強制鄰居）"""
+        is_valid = self.grid_map.is_valid
+        directions = []
+
+        if dy and dx:
+            # 對角線：沿兩個直向分量及對角線本身
+            vertical = is_valid(y + dy, x)
+            horizontal = is_valid(y, x + dx)
+            if vertical:
+                directions.append((dy, 0))
+            if horizontal:
+                directions.append((0, dx))
+            if vertical and horizontal:
+                directions.append((dy, dx))
+        elif dx:
+            # 水平移動
+            ahead = is_valid(y, x + dx)
+            up = is_valid(y + 1, x)
+            down = is_valid(y - 1, x)
+            if ahead:
+                directions.append((0, dx))
+                if up:
+                    directions.append((1, dx))
+                if down:
+                    directions.append((-1, dx))
+            if up:
+                directions.append((1, 0))
+            if down:
+                directions.append((-1, 0))
+        else:
+            # 垂直移動
+            ahead = is_valid(y + dy, x)
+            right = is_valid(y, x + 1)
+            left = is_valid(y, x - 1)
+            if ahead:
+                directions.append((dy, 0))
+                if right:
+                    directions.append((dy, 1))
+                if left:
+                    directions.append((dy, -1))
+            if right:
+                directions.append((0, 1))
+            if left:
+                directions.append((0, -1))
+
+        return directions
+
+    def _jump(self, y: int, x: int, dy: int, dx: int,
+              goal: Tuple[int, int]) -> Optional[Tuple[int, int]]:
+        """
+        從(y, x)沿(dy, dx)方向跳躍，返回遇到的跳點
 
-    def _reconstruct_path(self, node: Node) -> List[Tuple[int, int]]:
+        跳點為：終點、具有強制鄰居的格子，或（對角線時）
+        其直向分量能跳到跳點的格子。遇到障礙或邊界返回None。
+        以迴圈實作，避免長直線造成遞迴過深。
+        """
+        grid = self.grid_map.grid
+        height = self.grid_map.grid_height
+        width = self.grid_map.grid_width
+        goal_y, goal_x = goal
+
+        if dy and dx:
+            while True:
+                if not (0 <= y < height and 0 <= x < width) or grid[y][x]:
+                    return None
+                if y == goal_y and x == goal_x:
+                    return (y, x)
+                # 直向分量上有跳點，此格即為跳點
+                if (self._jump(y, x + dx, 0, dx, goal) is not None or
+                        self._jump(y + dy, x, dy, 0, goal) is not None):
+                    return (y, x)
+                # 下一步對角線需兩側皆可通行
+                if not (0 <= y + dy < height and 0 <= x + dx < width):
+                    return None
+                if grid[y][x + dx] or grid[y + dy][x]:
+                    return None
+                y += dy
+                x += dx
+
+        if dx:
+            # 水平跳躍：整列為bytearray，以find/rfind在C層級掃描
+            # 強制鄰居即上下列由障礙(1)轉為可通行(0)的位置
+            if not 0 <= y < height or not 0 <= x < width:
+                return None
+            row = grid[y]
+            sides = [side for side in (grid[y + 1] if y + 1 < height else None,
+                                       grid[y - 1] if y > 0 else None)
+                     if side is not None]
+
+            if dx > 0:
+                end = row.find(1, x)
+                if end < 0:
+                    end = width
+                found = goal_x if y == goal_y and x <= goal_x < end else end
+                for side in sides:
+                    i = side.find(b'\x01\x00', x - 1, found + 1)
+                    if i >= 0 and i + 1 < found:
+                        found = i + 1
+                return (y, found) if found < end else None
+
+            end = row.rfind(1, 0, x + 1)
+            found = goal_x if y == goal_y and end < goal_x <= x else end
+            for side in sides:
+                i = side.rfind(b'\x00\x01', max(found, 0), x + 2)
+                if i > found:
+                    found = i
+            return (y, found) if found > end else None
+
+        # 垂直跳躍：檢查左右兩行是否出現強制鄰居
+        if not 0 <= x < width:
+            return None
+        has_left = x > 0
+        has_right = x + 1 < width
+        while True:
+            if not 0 <= y < height:
+                return None
+            row = grid[y]
+            if row[x]:
+                return None
+            if y == goal_y and x == goal_x:
+                return (y, x)
+            back = grid[y - dy]
+            if ((has_left and not row[x - 1] and back[x - 1]) or
+                    (has_right and not row[x + 1] and back[x + 1])):
+                return (y, x)
+            y += dy
+
+    def _heuristic(self, pos1: Tuple[int, int], pos2: Tuple[int, int]) -> int:
+        """啟發式函數（八方向柵格的octile距離，整數成本）"""
+        dy = abs(pos2[0] - pos1[0])
+        dx = abs(pos2[1] - pos1[1])
+        if dy < dx:
+            return STRAIGHT_COST * dx + (DIAGONAL_COST - STRAIGHT_COST) * dy
+        return STRAIGHT_COST * dy + (DIAGONAL_COST - STRAIGHT_COST) * dx
+
+    def _reconstruct_path(self, parents: dict,
+                          end: Tuple[int, int]) -> List[Tuple[int, int]]:
         """重建路徑"""
         path = []
-        current = node
+        current = end
         while current is not None:
-            path.append(current.position)
-            current = current.parent
+            path.append(current)
+            current = parents[current]
         return list(reversed(path))
 
     def _smooth_path(self, path: List[Tuple[float, float]],
@@ -309,71 +628,102 @@ class AStarPathfinder:
         """
         路徑平滑 - 使用Douglas-Peucker簡化算法
         移除不必要的中間點，保持主要轉折點
+
+        1. 以堆疊迭代執行Douglas-Peucker：弦線偏差超過epsilon(度)
+           或弦線穿過障礙時，於最遠點分割
+        2. 對保留的點做視線檢查，連接到最遠的可見點
+        兩階段共用以路徑索引為鍵的視線快取，每個點只轉換一次柵格座標。
         """
         if len(path) <= 2:
             return path
 
-        # 使用簡單的視線檢查法
+        n = len(path)
+        to_grid = self.grid_map.latlon_to_grid
+        grid_path = [to_grid(lat, lon) for lat, lon in path]
+        grid_line_of_sight = self._grid_line_of_sight
+        los_cache = {}
+
+        def line_of_sight(a: int, b: int) -> bool:
+            visible = los_cache.get((a, b))
+            if visible is None:
+                visible = grid_line_of_sight(grid_path[a], grid_path[b])
+                los_cache[(a, b)] = visible
+            return visible
+
+        keep = [False] * n
+        keep[0] = keep[-1] = True
+        stack = [(0, n - 1)]
+
+        while stack:
+            lo, hi = stack.pop()
+            if hi - lo < 2:
+                continue
+
+            y0, x0 = path[lo]
+            dy = path[hi][0] - y0
+            dx = path[hi][1] - x0
+
+            # 以外積找出離弦線最遠的點（省略除以弦長，改與epsilon*弦長比較）
+            max_cross = -1.0
+            split = lo + 1
+            for i in range(lo + 1, hi):
+                py, px = path[i]
+                cross = abs(dx * (py - y0) - dy * (px - x0))
+                if cross > max_cross:
+                    max_cross = cross
+                    split = i
+
+            if (max_cross > epsilon * math.hypot(dy, dx) or
+                    not line_of_sight(lo, hi)):
+                keep[split] = True
+                stack.append((lo, split))
+                stack.append((split, hi))
+
+        kept = [i for i in range(n) if keep[i]]
+
+        # 對保留點使用視線檢查法（DP已檢查過的弦線直接取快取）
         smoothed = [path[0]]
         current_idx = 0
 
-        while current_idx < len(path) - 1:
+        while current_idx < len(kept) - 1:
             # 嘗試連接到最遠的可見點
             farthest_visible = current_idx + 1
 
-            for test_idx in range(len(path) - 1, current_idx, -1):
-                if self._has_line_of_sight(path[current_idx], path[test_idx]):
+            for test_idx in range(len(kept) - 1, current_idx + 1, -1):
+                if line_of_sight(kept[current_idx], kept[test_idx]):
                     farthest_visible = test_idx
                     break
 
-            if farthest_visible > current_idx + 1:
-                # 跳過中間點
-                smoothed.append(path[farthest_visible])
-                current_idx = farthest_visible
-            else:
-                # 添加下一個點
-                smoothed.append(path[current_idx + 1])
-                current_idx += 1
+            smoothed.append(path[kept[farthest_visible]])
+            current_idx = farthest_visible
 
         return smoothed
 
-    def _has_line_of_sight(self, start: Tuple[float, float],
-                           end: Tuple[float, float]) -> bool:
-        """檢查兩點間是否有視線（無障礙物）"""
-        start_grid = self.grid_map.latlon_to_grid(*start)
-        end_grid = self.grid_map.latlon_to_grid(*end)
-
-        # 使用Bresenham直線算法檢查中間格子
-        points = self._bresenham_line(start_grid, end_grid)
-
-        for y, x in points:
-            if not self.grid_map.is_valid(y, x):
-                return False
-
-        return True
+    def _grid_line_of_sight(self, start: Tuple[int, int],
+                            end: Tuple[int, int]) -> bool:
+        """
+        檢查兩柵格間是否有視線
 
-    def _bresenham_line(self, start: Tuple[int, int],
-                        end: Tuple[int, int]) -> List[Tuple[int, int]]:
-        """Bresenham直線算法 - 獲取直線經過的所有格子"""
-        y0, x0 = start
+        Bresenham直線走訪時直接讀取柵格，遇到第一個障礙格即返回，
+        不建立中間的格子列表。座標須在柵格範圍內（latlon_to_grid已限制）。
+        """
+        grid = self.grid_map.grid
+        y, x = start
         y1, x1 = end
 
-        points = []
-        dx = abs(x1 - x0)
-        dy = abs(y1 - y0)
-        sx = 1 if x0 < x1 else -1
-        sy = 1 if y0 < y1 else -1
+        dx = abs(x1 - x)
+        dy = abs(y1 - y)
+        sx = 1 if x < x1 else -1
+        sy = 1 if y < y1 else -1
         err = dx - dy
 
-        x, y = x0, y0
-
         while True:
-            points.append((y, x))
-
+            if grid[y][x]:
+                return False
             if x == x1 and y == y1:
-                break
+                return True
 
-            e2 = 2 * err
+            e2 = err << 1
             if e2 > -dy:
                 err -= dy
                 x += sx
@@ -381,4 +731,165 @@ class AStarPathfinder:
                 err += dx
                 y += sy
 
-        return points
+    def _bresenham_any_blocked(self, start: Tuple[int, int],
+                               end: Tuple[int, int]) -> bool:
+        """
+        檢查兩柵格間的Bresenham直線是否經過障礙格
+
+        端點來自 latlon_to_grid（已限制在範圍內），直線不會超出兩端點的
+        外接矩形，因此直接走訪柵格，遇到第一個障礙格即返回。
+        """
+        return not self._grid_line_of_sight(start, end)
+
+
+class HierarchicalAStar(AStarPathfinder):
+    """
+    分層(叢集)A*尋路
+
+    將柵格切成 cluster_size x cluster_size 的叢集，先在叢集圖上以A*
+    選出叢集走廊，再只在走廊內做柵格A*。叢集圖建立一次後快取，
+    柵格版本號改變（標記障礙/邊界）時重建，適合同一地圖多次查詢。
+    """
+
+    def __init__(self, grid_map: GridMap, cluster_size: int = 32):
+        super().__init__(grid_map)
+        self.cluster_size = cluster_size
+        self.clusters_high = (grid_map.grid_height + cluster_size - 1) // cluster_size
+        self.clusters_wide = (grid_map.grid_width + cluster_size - 1) // cluster_size
+        self.clusters: List[List[dict]] = []
+        self._built_version = None
+
+    def _search(self, starts: List[Tuple[int, int]], goal: Tuple[int, int],
+                allow_diagonal: bool) -> Optional[List[Tuple[int, int]]]:
+        """先走廊內搜尋，失敗時退回整張柵格搜尋"""
+        # 地圖只有少數叢集時分層沒有好處，直接整圖搜尋
+        if len(starts) != 1 or self.clusters_high * self.clusters_wide <= 4:
+            return super()._search(starts, goal, allow_diagonal)
+
+        if self._built_version != self.grid_map.version:
+            self._build_clusters()
+
+        corridor = self._find_corridor(starts[0], goal)
+        if corridor is not None:
+            corridor_finder = AStarPathfinder(self._corridor_grid_map(corridor))
+            path = corridor_finder._search(starts, goal, allow_diagonal)
+            if path is not None:
+                return path
+            logger.debug("叢集走廊內找不到路徑，改用整圖搜尋")
+
+        return super()._search(starts, goal, allow_diagonal)
+
+    def _build_clusters(self):
+        """
+        建立叢集圖
+
+        self.clusters[cy][cx] = {'edges': {(ncy, ncx): cost}}
+        相鄰叢集交界兩側至少有一處皆可通行時才建立邊，成本取兩叢集中心距離。
+        走廊搜尋只需要連通關係，不記錄入口點位置，找到第一個通口即停止檢查。
+        """
+        grid = self.grid_map.grid
+        k = self.cluster_size
+        height = self.grid_map.grid_height
+        width = self.grid_map.grid_width
+        self.clusters = [[{'edges': {}}
+                          for _ in range(self.clusters_wide)]
+                         for _ in range(self.clusters_high)]
+
+        for cy in range(self.clusters_high):
+            y0 = cy * k
+            y1 = min(y0 + k, height)
+            for cx in range(self.clusters_wide):
+                x0 = cx * k
+                x1 = min(x0 + k, width)
+
+                # 右側交界：x1-1 與 x1 兩欄
+                if x1 < width and any(not grid[y][x1 - 1] and not grid[y][x1]
+                                      for y in range(y0, y1)):
+                    self._link_clusters((cy, cx), (cy, cx + 1))
+
+                # 下側交界：y1-1 與 y1 兩列
+                if y1 < height:
+                    row_a = grid[y1 - 1]
+                    row_b = grid[y1]
+                    if any(not row_a[x] and not row_b[x] for x in range(x0, x1)):
+                        self._link_clusters((cy, cx), (cy + 1, cx))
+
+        self._built_version = self.grid_map.version
+        logger.debug("叢集圖建立: %dx%d (叢集大小:%d)",
+                     self.clusters_wide, self.clusters_high, k)
+
+    def _link_clusters(self, a: Tuple[int, int], b: Tuple[int, int]):
+        """連接兩個相鄰叢集（雙向邊）"""
+        self.clusters[a[0]][a[1]]['edges'][b] = STRAIGHT_COST
+        self.clusters[b[0]][b[1]]['edges'][a] = STRAIGHT_COST
+
+    def _find_corridor(self, start: Tuple[int, int],
+                       goal: Tuple[int, int]) -> Optional[Set[Tuple[int, int]]]:
+        """
+        在叢集圖上做A*，返回走廊叢集集合
+
+        走廊包含抽象路徑上的叢集及其八鄰叢集，保留繞行空間；
+        叢集圖不連通時返回None。
+        """
+        k = self.cluster_size
+        start_c = (start[0] // k, start[1] // k)
+        goal_c = (goal[0] // k, goal[1] // k)
+        heuristic = self._heuristic
+
+        tie = itertools.count(0, -1)
+        open_list = [(heuristic(start_c, goal_c), next(tie), 0, start_c)]
+        g_scores: Dict[Tuple[int, int], int] = {start_c: 0}
+        parents = {start_c: None}
+        closed_set: Set[Tuple[int, int]] = set()
+
+        while open_list:
+            _, _, g, current = heapq.heappop(open_list)
+            if current == goal_c:
+                break
+            if current in closed_set:
+                continue
+            closed_set.add(current)
+
+            for neighbor, cost in self.clusters[current[0]][current[1]]['edges'].items():
+                tentative_g = g + cost
+                best_g = g_scores.get(neighbor)
+                if best_g is None or tentative_g < best_g:
+                    g_scores[neighbor] = tentative_g
+                    parents[neighbor] = current
+                    f = tentative_g + heuristic(neighbor, goal_c)
+                    heapq.heappush(open_list, (f, next(tie), tentative_g, neighbor))
+        else:
+            return None
+
+        corridor = set()
+        for cy, cx in self._reconstruct_path(parents, goal_c):
+            for dy in (-1, 0, 1):
+                for dx in (-1, 0, 1):
+                    ny, nx = cy + dy, cx + dx
+                    if 0 <= ny < self.clusters_high and 0 <= nx < self.clusters_wide:
+                        corridor.add((ny, nx))
+        return corridor
+
+    def _corridor_grid_map(self, corridor: Set[Tuple[int, int]]) -> GridMap:
+        """建立只保留走廊叢集的柵格地圖（走廊外視為障礙）"""
+        k = self.cluster_size
+        grid = self.grid_map.grid
+        width = self.grid_map.grid_width
+        blocked_row = b'\x01' * width
+
+        # 每個叢集列在走廊內的欄區段
+        row_spans = [[] for _ in range(self.clusters_high)]
+        for cy, cx in corridor:
+            row_spans[cy].append((cx * k, min(cx * k + k, width)))
+
+        masked = []
+        for y in range(self.grid_map.grid_height):
+            row = bytearray(blocked_row)
+            src = grid[y]
+            for x0, x1 in row_spans[y // k]:
+                row[x0:x1] = src[x0:x1]
+            masked.append(row)
+
+        corridor_map = copy.copy(self.grid_map)
+        corridor_map.grid = masked
+        return corridor_map
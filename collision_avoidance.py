@@ -4,6 +4,7 @@
 """
 
 import math
+from itertools import islice
 from typing import List, Tuple
 
 
@@ -16,6 +17,14 @@ class CollisionAvoidanceSystem:
     def __init__(self, safety_distance: float = 5.0):
         self.safety_distance = safety_distance
         self.earth_radius_m = 111111.0
+        self._m_per_lon = None  # 參考緯度下每度經度的公尺數
+    
+    def set_reference_lat(self, lat: float):
+        """
+        設定作業區參考緯度
+        作業區範圍小，經度縮放可共用同一個cos值，距離計算不必每次算三角函數
+        """
+        self._m_per_lon = self.earth_radius_m * math.cos(math.radians(lat))
     
     def calculate_loiter_delay(self, prev_waypoints: List[Tuple[float, float]], 
                               current_start: Tuple[float, float],
@@ -28,90 +37,43 @@ class CollisionAvoidanceSystem:
             return 0.0
         
         # 找到前一台無人機離開安全範圍的時間點
+        # 單次走訪：每個航點只投影一次為平面公尺座標，同時累積航段距離
+        # 並以距離平方比較是否離開起點安全範圍
         clearance_time = 0.0
         cumulative_distance = 0.0
+        earth_radius_m = self.earth_radius_m
+        safety_distance_sq = self.safety_distance * self.safety_distance
+        hypot = math.hypot
+        
+        # 未設定參考緯度時，以本次起點緯度計算一次經度縮放
+        m_per_lon = self._m_per_lon
+        if m_per_lon is None:
+            m_per_lon = earth_radius_m * math.cos(math.radians(current_start[0]))
+        
+        start_y = current_start[0] * earth_radius_m
+        start_x = current_start[1] * m_per_lon
+        prev_y = prev_waypoints[0][0] * earth_radius_m
+        prev_x = prev_waypoints[0][1] * m_per_lon
         
-        for i in range(len(prev_waypoints) - 1):
-            segment_distance = self.calculate_distance(
-                prev_waypoints[i][0], prev_waypoints[i][1],
-                prev_waypoints[i+1][0], prev_waypoints[i+1][1]
-            )
-            cumulative_distance += segment_distance
+        for lat, lon in islice(prev_waypoints, 1, None):
+            y = lat * earth_radius_m
+            x = lon * m_per_lon
+            cumulative_distance += hypot(y - prev_y, x - prev_x)
             
             # 檢查是否已經離開起點的安全範圍
-            distance_from_start = self.calculate_distance(
-                current_start[0], current_start[1],
-                prev_waypoints[i+1][0], prev_waypoints[i+1][1]
-            )
+            dy = y - start_y
+            dx = x - start_x
             
-            if distance_from_start > self.safety_distance:
+            if dy * dy + dx * dx > safety_distance_sq:
                 # 計算到達這個點的時間
                 clearance_time = cumulative_distance / cruise_speed
                 break
+            
+            prev_y, prev_x = y, x
         
         # 加上額外的安全緩衝
         return clearance_time + 2.0  # 2秒額外緩衝
     
-    def calculate_distance(self, lat1: float, lon1: float, 
-                         lat2: float, lon2: float) -> float:
-        """計算兩點間的精確距離（公尺）"""
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        avg_lat = (lat1 + lat2) / 2
-        
-        distance = math.sqrt(
-            (dlat * self.earth_radius_m) ** 2 + 
-            (dlon * self.earth_radius_m * math.cos(math.radians(avg_lat))) ** 2
-        )
-        return distance
-    
-    def insert_loiter_command(self, waypoint_lines: List[str], 
-                            loiter_time: float, insert_after_line: int = 2) -> List[str]:
-        """
-        在航點文件中插入LOITER命令
-        MAV_CMD_NAV_LOITER_TIME (19) - 在當前位置懸停指定時間
-        """
-        if loiter_time <= 0:
-            return waypoint_lines
-        
-        new_lines = []
-        seq_offset = 0
-        
-        for i, line in enumerate(waypoint_lines):
-            # 跳過註釋行
-            if line.startswith('#'):
-                new_lines.append(line)
-                continue
-            
-            new_lines.append(line)
-            
-            # 在速度設定後加入LOITER命令
-            if i == insert_after_line and not line.startswith('#'):
-                seq_offset += 1
-                # MAV_CMD_NAV_LOITER_TIME: 在當前位置懸停
-                loiter_line = f"{seq_offset}\t0\t3\t19\t{loiter_time:.1f}\t0\t0\t0\t0\t0\t0\t1"
-                new_lines.append(loiter_line)
-        
-        # 更新所有後續序列號
-        return self.update_sequence_numbers(new_lines, seq_offset)
-    
-    def update_sequence_numbers(self, lines: List[str], offset: int) -> List[str]:
-        """更新序列號"""
-        if offset == 0:
-            return lines
-        
-        final_lines = []
-        for i, line in enumerate(lines):
-            if line.startswith('#') or i <= 3:  # 註釋和前幾行不變
-                final_lines.append(line)
-            else:
-                parts = line.split('\t')
-                if len(parts) > 0 and parts[0].isdigit():
-                    seq = int(parts[0])
-                    if seq > 2:  # 只更新後續航點
-                        parts[0] = str(seq + offset)
-                    final_lines.append('\t'.join(parts))
-                else:
-                    final_lines.append(line)
-        
-        return final_lines
\ No newline at end of file
+    def loiter_command(self, loiter_time: float) -> str:
+        """LOITER命令（不含序列號）- MAV_CMD_NAV_LOITER_TIME (19)"""
+        return f"0\t3\t19\t{loiter_time:.1f}\t0\t0\t0\t0\t0\t0\t1"
\ No newline at end of file
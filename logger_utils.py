@@ -9,27 +9,11 @@ import logging
 # ==============================
 # 日誌配置
 # ==============================
-class Logger:
-    """統一的日誌管理器"""
-    def __init__(self):
-        logging.basicConfig(
-            level=logging.INFO,
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
-        )
-        self.logger = logging.getLogger(__name__)
-    
-    def info(self, msg): 
-        self.logger.info(msg)
-    
-    def warning(self, msg): 
-        self.logger.warning(msg)
-    
-    def error(self, msg): 
-        self.logger.error(msg)
-    
-    def critical(self, msg): 
-        self.logger.critical(msg)
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
 
-
-# 全局日誌實例
-logger = Logger()
\ No newline at end of file
+# 全局日誌實例（直接使用logging.Logger；呼叫端以%格式傳參，
+# 訊息只在該層級啟用時才格式化）
+logger = logging.getLogger(__name__)
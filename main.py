@@ -23,7 +23,7 @@ def main():
         app.mainloop()
         
     except Exception as e:
-        logger.critical(f"程式啟動失敗: {e}")
+        logger.critical("程式啟動失敗: %s", e)
         messagebox.showerror("啟動錯誤", f"程式啟動失敗: {str(e)}")
     finally:
         logger.info("程式已退出")
@@ -6,9 +6,13 @@
 
 import os
 import math
+import functools
+import contextlib
+from pathlib import Path
 import tkinter as tk
 from tkinter import ttk, messagebox, filedialog
 import tkintermapview
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Tuple, Optional
 
 from config import Config, FlightDynamics, FlightParameters
@@ -21,6 +25,57 @@ from map_manager import MapManager
 from obstacle_ui_extension import ObstacleUIExtension
 
 
+# 子區域底色調色盤預先解析為 (r, g, b)，繪製時不必再解析十六進位字串
+_PALETTE_RGB = [tuple(bytes.fromhex(c[1:7])) for c in Config.REGION_FILL_COLORS]
+_NUM_PALETTE = len(_PALETTE_RGB)
+
+# 航線顏色（區域索引循環取用）
+_PATH_COLORS = tuple(Config.PATH_COLORS)
+_NUM_PATH_COLORS = len(_PATH_COLORS)
+
+# tkintermapview 路徑／多邊形／標記持有的畫布項目屬性，以及地圖元件記錄這些物件的清單
+_CANVAS_ITEM_ATTRS = ('canvas_line', 'canvas_polygon', 'polygon', 'big_circle',
+                      'canvas_text', 'canvas_icon', 'canvas_image')
+_MAP_OBJECT_LISTS = ('canvas_path_list', 'canvas_polygon_list', 'canvas_marker_list')
+
+# 任務簡報範本（匯出時以 format_map 一次填入）
+_BRIEFING_RULE = "=" * 50
+_BRIEFING_HEADER_TEMPLATE = (
+    "{rule}\n"
+    "無人機群飛行任務簡報\n"
+    "{rule}\n\n"
+    "飛行模式: {flight_mode}\n"
+    "子區域數量: {sub_count}\n"
+    "安全間距: {safety_distance}公尺\n"
+    "子區域間隔: {spacing_m}公尺\n\n"
+    "飛行參數:\n"
+    "  - 飛行高度: {altitude:.1f}公尺\n"
+    "  - 飛行速度: {speed:.1f}公尺/秒\n"
+    "  - 航線間距: {spacing:.1f}公尺\n"
+    "  - 掃描角度: {angle:.1f}度\n\n"
+)
+_BRIEFING_OBSTACLE_TEMPLATE = "障礙物數量: {obstacle_count} 個\n\n"
+_BRIEFING_REGION_TEMPLATE = (
+    "\n區域 {idx}:\n"
+    "  - LOITER等待: {loiter_time:.1f}秒\n"
+    "  - RTL高度: {rtl_alt:.1f}公尺\n"
+    "  - 任務特點: 完整循環返回起點\n"
+)
+_BRIEFING_FOOTER_TEMPLATE = (
+    "\n{rule}\n"
+    "任務執行注意事項:\n"
+    "1. 確保所有無人機電池充足\n"
+    "2. 檢查GPS信號強度\n"
+    "3. 確認安全區域無障礙物\n"
+    "4. 監控LOITER等待狀態\n"
+    "5. RTL時注意高度分層\n"
+    "6. 子區域間隔設定: {spacing_m}公尺\n"
+)
+
+# 所有飛行航線共用的畫布標籤，樣式變更時一次套用到全部航線
+_FLIGHT_PATH_TAG = "flight_path"
+
+
 # ==============================
 # 主應用程式類
 # ==============================
@@ -36,6 +91,11 @@ class DronePathPlannerApp(tk.Tk):
         self.create_widgets()
         self.bind_events()
         self._preview_after_id = None
+        self._resize_after_id = None
+        # 預覽計算在背景執行緒執行；序號遞增，過期的結果直接捨棄
+        self._preview_executor = ThreadPoolExecutor(max_workers=1)
+        self._preview_seq = 0
+        self._last_map_size = None
         
         # 延遲初始化地圖（增加延迟以确保UI完全加载）
         self.after(500, self.initialize_map)
@@ -91,7 +151,10 @@ class DronePathPlannerApp(tk.Tk):
         self.corners: List[Tuple[float, float]] = []
         self.markers: List = []
         self.paths: List = []
+        self.flight_paths: List = []  # 飛行航線（同時也在paths中）
         self.region_overlays: List = []
+        self.region_fill_overlays: List = []  # 子區域底色（同時也在region_overlays中）
+        self.drawn_sub_regions: List[List[Tuple[float, float]]] = []
         self.start_markers: List = []  # 起點標記
         self.end_markers: List = []    # 終點標記
         
@@ -152,10 +215,10 @@ class DronePathPlannerApp(tk.Tk):
             self.map.pack(fill=tk.BOTH, expand=True)
             
             # 地圖管理器
-            self.map_manager = MapManager(self.map)
+            self.map_manager = MapManager(self.map, on_server_changed=self._on_map_server_changed)
             
         except Exception as e:
-            logger.error(f"建立地圖元件失敗: {e}")
+            logger.error("建立地圖元件失敗: %s", e)
             # 建立備用標籤
             backup_label = ttk.Label(map_frame, text="地圖載入失敗\n請檢查網路連線", 
                                    font=("Segoe UI", 14), foreground="red")
@@ -176,10 +239,22 @@ class DronePathPlannerApp(tk.Tk):
         canvas.create_window((0, 0), window=scrollable_frame, anchor="nw")
         canvas.configure(yscrollcommand=scrollbar.set)
         
-        # 綁定滑鼠滾輪事件
+        # 綁定滑鼠滾輪事件（只在指標位於控制面板上時生效，不影響地圖縮放）
         def _on_mousewheel(event):
             canvas.yview_scroll(int(-1*(event.delta/120)), "units")
-        canvas.bind_all("<MouseWheel>", _on_mousewheel)
+        
+        canvas_path = str(canvas)
+        
+        def _on_leave(event):
+            # 移到面板內的子元件也會觸發Leave，指標仍在面板內時保留綁定
+            # （以路徑分隔符比對，避免 .!canvas2 之類的兄弟元件被誤判為子元件）
+            widget = canvas.winfo_containing(event.x_root, event.y_root)
+            w = str(widget) if widget is not None else ''
+            if not (w == canvas_path or w.startswith(canvas_path + '.')):
+                canvas.unbind_all("<MouseWheel>")
+        
+        canvas.bind("<Enter>", lambda e: canvas.bind_all("<MouseWheel>", _on_mousewheel))
+        canvas.bind("<Leave>", _on_leave)
         
         canvas.pack(side=tk.RIGHT, fill=tk.Y, padx=(5, 0), pady=5)
         scrollbar.pack(side=tk.RIGHT, fill=tk.Y, pady=5)
@@ -247,9 +322,11 @@ class DronePathPlannerApp(tk.Tk):
         ttk.Checkbutton(mode_frame, text="減少重疊（互補）", 
                        variable=self.reduce_overlap_var).pack(anchor=tk.W, pady=(8, 0))
         ttk.Checkbutton(mode_frame, text="顯示子區域底色", 
-                       variable=self.show_region_fill_var).pack(anchor=tk.W, pady=2)
+                       variable=self.show_region_fill_var,
+                       command=self.on_region_fill_toggle).pack(anchor=tk.W, pady=2)
         ttk.Checkbutton(mode_frame, text="顯示起終點", 
-                       variable=self.show_waypoints_var).pack(anchor=tk.W, pady=2)
+                       variable=self.show_waypoints_var,
+                       command=self.redraw_preview).pack(anchor=tk.W, pady=2)
         
         # 透明度滑桿（現代化）
         self.modern_sliders['alpha'] = ModernSlider(
@@ -296,7 +373,7 @@ class DronePathPlannerApp(tk.Tk):
         self.modern_sliders['path_width'] = ModernSlider(
             param_frame, label="航線寬度", from_=1, to=10, 
             value=Config.PATH_WIDTH_DEFAULT, resolution=1,
-            command=lambda v: self.schedule_preview_update(), unit="px"
+            command=self.on_path_width_change, unit="px"
         )
         self.modern_sliders['path_width'].pack(fill=tk.X, pady=5)
     
@@ -337,6 +414,15 @@ class DronePathPlannerApp(tk.Tk):
                   width=20).pack(fill=tk.X, pady=3)
         ttk.Button(ops_frame, text="重設全部", command=self.reset_all, 
                   style='Warning.TButton', width=20).pack(fill=tk.X, pady=3)
+        
+        # 狀態列（即時預覽的驗證訊息顯示於此，不彈出對話框）
+        self.status_label = ttk.Label(ops_frame, text="", wraplength=180,
+                                      font=("Segoe UI", 8), foreground=self.colors['text_secondary'])
+        self.status_label.pack(anchor=tk.W, pady=(5, 0))
+    
+    def set_status(self, text: str = "", color_key: str = 'text_secondary'):
+        """更新狀態列文字（原地更新，不阻塞事件迴圈）"""
+        self.status_label.config(text=text, foreground=self.colors[color_key])
     
     def create_map_selection_frame(self, parent):
         """建立地圖選擇框"""
@@ -345,12 +431,12 @@ class DronePathPlannerApp(tk.Tk):
         
         ttk.Label(map_frame, text="地圖類型:").pack(anchor=tk.W)
         map_var = tk.StringVar()
-        map_combo = ttk.Combobox(map_frame, textvariable=map_var, width=18,
+        self.map_combo = ttk.Combobox(map_frame, textvariable=map_var, width=18,
                                values=[name for name, _, _ in Config.MAP_SERVERS], 
                                state="readonly", style='Modern.TCombobox')
-        map_combo.pack(anchor=tk.W, pady=2)
-        map_combo.current(0)
-        map_combo.bind('<<ComboboxSelected>>', lambda e: self.switch_map_server(map_combo.current()))
+        self.map_combo.pack(anchor=tk.W, pady=2)
+        self.map_combo.current(0)
+        self.map_combo.bind('<<ComboboxSelected>>', lambda e: self.switch_map_server(self.map_combo.current()))
     
     def create_help_frame(self, parent):
         """建立說明框"""
@@ -413,10 +499,30 @@ class DronePathPlannerApp(tk.Tk):
         self.schedule_preview_update()
     
     def on_alpha_change(self, value):
-        """透明度改變事件"""
+        """透明度改變事件（只影響底色，不重新生成航點）"""
         self.region_alpha_var.set(int(value))
         if self.region_overlays:
-            self.preview_paths()
+            self.redraw_region_fills()
+    
+    def on_path_width_change(self, value):
+        """航線寬度改變事件（直接修改現有航線的樣式，不重新建立畫布物件）"""
+        width = max(1, int(value))
+        if not self.flight_paths:
+            self.redraw_preview()
+            return
+        
+        try:
+            for path in self.flight_paths:
+                path.width = width
+            self.map.canvas.itemconfig(_FLIGHT_PATH_TAG, width=width)
+        except Exception as e:
+            logger.warning("更新航線寬度失敗: %s", e)
+            self.redraw_preview()
+    
+    def on_region_fill_toggle(self):
+        """底色顯示切換（只重繪底色）"""
+        if self.region_overlays:
+            self.redraw_region_fills()
     
     def on_spacing_change(self, value):
         """新增：間隔改變事件"""
@@ -424,19 +530,23 @@ class DronePathPlannerApp(tk.Tk):
         self.schedule_preview_update()
     
     def schedule_preview_update(self, delay_ms: int = 120):
-        """排程即時預覽"""
-        try:
-            if self._preview_after_id is not None:
-                self.after_cancel(self._preview_after_id)
-        except Exception:
-            pass
-        self._preview_after_id = self.after(delay_ms, self.preview_paths)
+        """排程即時預覽（id 觸發後即清除，取消時只需檢查 None）"""
+        if self._preview_after_id is not None:
+            self.after_cancel(self._preview_after_id)
+        self._preview_after_id = self.after(delay_ms, self._run_scheduled_preview)
+    
+    def _run_scheduled_preview(self):
+        """執行排程中的預覽"""
+        self._preview_after_id = None
+        self.preview_paths()
     
     def initialize_map(self):
         """初始化地圖"""
         try:
             if hasattr(self, 'map_manager'):
                 self.map_manager.initialize_map()
+                # 伺服器可能依上次設定而非第一個，選單同步顯示
+                self.map_combo.current(self.map_manager.current_server)
                 self.map.add_left_click_map_command(self.on_map_click)
                 logger.info("地圖初始化完成")
                 
@@ -445,20 +555,31 @@ class DronePathPlannerApp(tk.Tk):
                     # 找到合適的位置插入障礙物UI（在飛行參數和智能避撞之間）
                     self.obstacle_ui_extension.add_obstacle_ui(self.control_panel)
         except Exception as e:
-            logger.error(f"地圖初始化失敗: {e}")
+            logger.error("地圖初始化失敗: %s", e)
     
     def on_resize(self, event):
-        """視窗大小改變事件"""
+        """視窗大小改變事件（拖曳時合併連續事件，只套用最後的大小）"""
         if event.widget == self:
-            try:
-                panel_width = 470
-                new_width = max(300, event.width - panel_width - 20)
-                new_height = max(200, event.height - 20)
-                
-                if hasattr(self, 'map'):
-                    self.map.configure(width=new_width, height=new_height)
-            except Exception as e:
-                logger.warning(f"調整地圖大小失敗: {e}")
+            panel_width = 470
+            new_width = max(300, event.width - panel_width - 20)
+            new_height = max(200, event.height - 20)
+            
+            if self._resize_after_id is not None:
+                self.after_cancel(self._resize_after_id)
+            self._resize_after_id = self.after(
+                80, self._apply_resize, new_width, new_height)
+    
+    def _apply_resize(self, new_width: int, new_height: int):
+        """套用地圖大小（大小未變時略過）"""
+        self._resize_after_id = None
+        if (new_width, new_height) == self._last_map_size:
+            return
+        try:
+            if hasattr(self, 'map'):
+                self.map.configure(width=new_width, height=new_height)
+                self._last_map_size = (new_width, new_height)
+        except Exception as e:
+            logger.warning("調整地圖大小失敗: %s", e)
     
     def switch_map_server(self, index):
         """切換地圖伺服器"""
@@ -466,7 +587,12 @@ class DronePathPlannerApp(tk.Tk):
             if hasattr(self, 'map_manager'):
                 self.map_manager.switch_map_server(index)
         except Exception as e:
-            logger.error(f"切換地圖伺服器失敗: {e}")
+            logger.error("切換地圖伺服器失敗: %s", e)
+    
+    def _on_map_server_changed(self, index: int):
+        """地圖管理器自動切換伺服器後，選單同步顯示"""
+        if hasattr(self, 'map_combo'):
+            self.map_combo.current(index)
     
     def on_map_click(self, coords):
         """地圖點擊事件"""
@@ -483,7 +609,7 @@ class DronePathPlannerApp(tk.Tk):
                 pass
 
         except Exception as e:
-            logger.error(f"處理地圖點擊失敗: {e}")
+            logger.error("處理地圖點擊失敗: %s", e)
             messagebox.showerror("錯誤", f"處理地圖點擊時發生錯誤: {str(e)}")
     
     def add_corner_point(self, lat: float, lon: float):
@@ -495,10 +621,10 @@ class DronePathPlannerApp(tk.Tk):
             self.markers.append(marker)
             self.corners.append((lat, lon))
             
-            logger.info(f"新增角點 P{point_num}: ({lat:.6f}, {lon:.6f})")
+            logger.info("新增角點 P%d: (%.6f, %.6f)", point_num, lat, lon)
             
         except Exception as e:
-            logger.error(f"新增角點失敗: {e}")
+            logger.error("新增角點失敗: %s", e)
     
     def edit_nearest_corner(self, lat: float, lon: float):
         """編輯最近的角點"""
@@ -507,35 +633,33 @@ class DronePathPlannerApp(tk.Tk):
                 return
             
             # 找到最近的角點
-            min_dist = float('inf')
-            nearest_idx = 0
-            
-            for i, (c_lat, c_lon) in enumerate(self.corners):
-                dist = self.calculate_distance(lat, lon, c_lat, c_lon)
-                if dist < min_dist:
-                    min_dist = dist
-                    nearest_idx = i
+            nearest_idx = self._nearest_corner_index(lat, lon)
             
             # 更新角點位置
             self.markers[nearest_idx].set_position(lat, lon)
             self.corners[nearest_idx] = (lat, lon)
             
-            logger.info(f"編輯角點 P{nearest_idx + 1}: ({lat:.6f}, {lon:.6f})")
+            logger.info("編輯角點 P%d: (%.6f, %.6f)", nearest_idx + 1, lat, lon)
             
         except Exception as e:
-            logger.error(f"編輯角點失敗: {e}")
+            logger.error("編輯角點失敗: %s", e)
     
-    def calculate_distance(self, lat1: float, lon1: float, lat2: float, lon2: float) -> float:
-        """計算兩點間距離"""
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
-        avg_lat = (lat1 + lat2) / 2
+    def _nearest_corner_index(self, lat: float, lon: float) -> int:
+        """
+        找出距離指定點最近的角點索引
+
+        只比較平方距離（不開根號），經度縮放係數在點擊位置計算一次，
+        不必對每個角點重算三角函數。
+        """
+        lon_factor = math.cos(math.radians(lat))
         
-        distance = math.sqrt(
-            (dlat * Config.EARTH_RADIUS_M) ** 2 + 
-            (dlon * Config.EARTH_RADIUS_M * math.cos(math.radians(avg_lat))) ** 2
-        )
-        return distance
+        def squared_distance(i: int) -> float:
+            c_lat, c_lon = self.corners[i]
+            dlat = c_lat - lat
+            dlon = (c_lon - lon) * lon_factor
+            return dlat * dlat + dlon * dlon
+        
+        return min(range(len(self.corners)), key=squared_distance)
     
     def finish_boundary(self):
         """完成邊界設定"""
@@ -559,10 +683,10 @@ class DronePathPlannerApp(tk.Tk):
             self.mode_var.set("Edit")
             
             messagebox.showinfo("完成", f"邊界設定完成，共{len(self.corners)}個角點")
-            logger.info(f"邊界設定完成，{len(self.corners)}個角點")
+            logger.info("邊界設定完成，%d個角點", len(self.corners))
             
         except Exception as e:
-            logger.error(f"完成邊界設定失敗: {e}")
+            logger.error("完成邊界設定失敗: %s", e)
             messagebox.showerror("錯誤", f"完成邊界設定失敗: {str(e)}")
     
     def remove_last_corner(self):
@@ -576,13 +700,18 @@ class DronePathPlannerApp(tk.Tk):
             last_marker.delete()
             self.corners.pop()
             
-            logger.info(f"刪除角點，剩餘{len(self.corners)}個邊界點")
+            logger.info("刪除角點，剩餘%d個邊界點", len(self.corners))
             
         except Exception as e:
-            logger.error(f"刪除角點失敗: {e}")
+            logger.error("刪除角點失敗: %s", e)
     
-    def get_flight_parameters(self) -> Optional[FlightParameters]:
-        """取得飛行參數"""
+    def get_flight_parameters(self, show_dialog: bool = True) -> Optional[FlightParameters]:
+        """
+        取得飛行參數
+
+        Args:
+            show_dialog: False時參數錯誤只顯示於狀態列（即時預覽使用）
+        """
         try:
             # 從現代滑桿獲取值
             params = FlightParameters(
@@ -596,130 +725,308 @@ class DronePathPlannerApp(tk.Tk):
             params.validate()
             return params
         except Exception as e:
-            messagebox.showerror("參數錯誤", str(e))
+            if show_dialog:
+                messagebox.showerror("參數錯誤", str(e))
+            else:
+                self.set_status(f"參數錯誤: {e}", 'warning')
             return None
     
+    @contextlib.contextmanager
+    def _map_batch(self):
+        """
+        批次更新地圖物件（繪製或刪除路徑、多邊形、標記）
+
+        tkintermapview 每個物件 draw() 都會呼叫 manage_z_order() 重排整張畫布的圖層，
+        標記的 delete() 還會呼叫 canvas.update() 強制重繪。區塊內暫時停用這兩個呼叫，
+        結束時只重排圖層一次並更新畫布一次。
+        """
+        map_widget = getattr(self, 'map', None)
+        canvas = getattr(map_widget, 'canvas', None)
+        # 已在外層批次中時直接沿用外層的停用狀態
+        if canvas is None or 'manage_z_order' in vars(map_widget):
+            yield
+            return
+        
+        map_widget.manage_z_order = lambda: None
+        canvas.update = lambda: None
+        try:
+            yield
+        finally:
+            del canvas.update
+            del map_widget.manage_z_order
+            map_widget.manage_z_order()
+            canvas.update_idletasks()
+    
+    def _delete_map_objects(self, objects):
+        """
+        批次刪除地圖物件，畫布只重繪一次
+
+        已刪除的物件（tkintermapview 會設定 deleted 旗標）直接略過，
+        不靠逐一捕捉例外；刪除失敗時由呼叫端的 try 統一處理。
+
+        等同逐一呼叫 delete()，但所有畫布項目以一次 canvas.delete 刪除，
+        地圖元件的物件清單也只重建一次（delete() 每次都要線性搜尋並移除）。
+        地圖元件結構不符預期時退回逐一 delete()。
+        """
+        pending = [obj for obj in objects if not getattr(obj, 'deleted', False)]
+        if not pending:
+            return
+        
+        with self._map_batch():
+            try:
+                self._bulk_delete_map_objects(pending)
+            except AttributeError:
+                for obj in pending:
+                    if not getattr(obj, 'deleted', False):
+                        obj.delete()
+    
+    def _bulk_delete_map_objects(self, objects):
+        """以單次 Tcl 呼叫刪除物件的所有畫布項目，並標記為已刪除"""
+        map_widget = self.map
+        canvas = map_widget.canvas
+        
+        # 從地圖元件的物件清單移除（原地修改，保留清單物件本身）
+        removed = {id(obj) for obj in objects}
+        for list_name in _MAP_OBJECT_LISTS:
+            object_list = getattr(map_widget, list_name)
+            object_list[:] = [obj for obj in object_list if id(obj) not in removed]
+        
+        item_ids = []
+        for obj in objects:
+            for attr in _CANVAS_ITEM_ATTRS:
+                item_id = getattr(obj, attr, None)
+                if item_id is not None:
+                    item_ids.append(item_id)
+                    setattr(obj, attr, None)
+            obj.deleted = True
+        
+        if item_ids:
+            canvas.delete(*item_ids)
+    
     def clear_region_overlays(self):
         """清除區域覆蓋層"""
         try:
-            for overlay in self.region_overlays:
-                try:
-                    overlay.delete()
-                except Exception:
-                    pass
+            self._delete_map_objects(self.region_overlays)
             self.region_overlays.clear()
+            self.region_fill_overlays.clear()
         except Exception as e:
-            logger.warning(f"清除區域覆蓋層失敗: {e}")
+            logger.warning("清除區域覆蓋層失敗: %s", e)
     
     def clear_start_end_markers(self):
         """清除起終點標記"""
         try:
-            for marker in self.start_markers + self.end_markers:
-                try:
-                    marker.delete()
-                except Exception:
-                    pass
+            self._delete_map_objects(self.start_markers + self.end_markers)
             self.start_markers.clear()
             self.end_markers.clear()
         except Exception as e:
-            logger.warning(f"清除起終點標記失敗: {e}")
+            logger.warning("清除起終點標記失敗: %s", e)
     
-    def preview_paths(self):
-        """預覽路徑 - 整合完整的智能避撞功能和障礙物避讓"""
+    def preview_paths(self, background: bool = True):
+        """
+        預覽路徑 - 整合完整的智能避撞功能和障礙物避讓
+
+        區域分割與繪製在主執行緒完成；航點生成、避障與LOITER計算
+        交給背景執行緒，完成後再回到主執行緒繪製，拖曳滑桿時介面不會卡住。
+        計算一律交給單一工作執行緒的執行器，避障器與避撞系統的共用狀態
+        （參考緯度、柵格地圖）不會同時被兩個計算使用。
+
+        Args:
+            background: False時等待計算完成（匯出前需要立即取得結果）
+        """
         try:
-            # 清除舊的路徑和標記
+            # 清除舊的路徑和標記（舊結果作廢，匯出時會重新同步計算）
             self.clear_paths()
             self.clear_region_overlays()
             self.clear_start_end_markers()
+            self.current_waypoint_results = []
             
-            if len(self.corners) < Config.MIN_CORNERS:
-                messagebox.showwarning("錯誤", f"需要至少{Config.MIN_CORNERS}個角點才能預覽")
+            # 角點快照：整個預覽只讀取一次，子區域也不會與之後的編輯共用同一串列
+            corners = list(self.corners)
+            # 預覽可能由滑桿拖曳反覆觸發，驗證訊息只更新狀態列
+            if len(corners) < Config.MIN_CORNERS:
+                self.set_status(f"需要至少{Config.MIN_CORNERS}個角點才能預覽", 'warning')
                 return
             
             # 取得飛行參數
-            params = self.get_flight_parameters()
+            params = self.get_flight_parameters(show_dialog=False)
             if not params:
                 return
             
+            # 一次讀取所有介面變數，之後只使用快照
+            ui = self._snapshot_ui_state()
+            
+            # 以邊界中心緯度作為距離計算的參考緯度（在工作執行緒中設定）
+            center_lat = sum(c[0] for c in corners) / len(corners)
+            
             # 分割區域（使用新的間隔功能）
-            sub_count = self.sub_var.get()
-            spacing_m = self.region_spacing_var.get()  # 取得間隔設定
+            sub_count = ui['sub_count']
+            spacing_m = ui['spacing_m']  # 取得間隔設定
             
-            if len(self.corners) == 4:
-                sub_regions = RegionDivider.subdivide_rectangle(self.corners, sub_count, spacing_m)
+            if len(corners) == 4:
+                sub_regions = RegionDivider.subdivide_rectangle(corners, sub_count, spacing_m)
             else:
-                sub_regions = RegionDivider.subdivide_polygon(self.corners, sub_count, spacing_m)
+                sub_regions = RegionDivider.subdivide_polygon(corners, sub_count, spacing_m)
             
             # 繪製子區域
-            self.draw_sub_regions(sub_regions)
+            with self._map_batch():
+                self.draw_sub_regions(sub_regions, ui)
             
-            # 取得飛行模式
-            flight_mode = self.flight_mode_var.get()
+            self._preview_seq += 1
+            seq = self._preview_seq
+            args = (sub_regions, params, sub_count, ui['flight_mode'], ui['reduce_overlap'],
+                    center_lat)
             
-            # 生成航點並計算LOITER時間
-            waypoint_results = []
-            loiter_times = []
-            prev_waypoints = None
+            if not background:
+                # 排在進行中的預覽之後（其序號已過時，會在下個子區域前結束），不與其並行
+                future = self._preview_executor.submit(self._compute_preview, *args)
+                waypoint_results, loiter_times = future.result()
+                self._apply_preview(waypoint_results, loiter_times, ui)
+                return
             
-            for idx, region_corners in enumerate(sub_regions):
-                # 確定起始方向
-                start_from_left = (idx % 2 == 0) if self.reduce_overlap_var.get() else True
-                
-                # 計算LOITER時間（智能避撞模式）
-                loiter_time = 0.0
-                if flight_mode == "智能避撞" and idx > 0 and prev_waypoints:
-                    # 計算需要等待前一台離開安全範圍的時間
-                    loiter_time = self.waypoint_generator.collision_avoidance.calculate_loiter_delay(
-                        prev_waypoints, region_corners[0], params.speed
-                    )
-                    loiter_time += idx * 5.0  # 額外錯開時間
-                
-                loiter_times.append(loiter_time)
-                
-                # 生成完整任務航點
-                waypoint_lines, waypoints = self.waypoint_generator.generate_complete_mission(
-                    region_corners, params, idx, sub_count, start_from_left, loiter_time
+            future = self._preview_executor.submit(self._compute_preview, *args, seq=seq)
+            self.after(20, self._poll_preview, seq, future, ui)
+            
+        except Exception as e:
+            logger.error("預覽路徑失敗: %s", e)
+            messagebox.showerror("預覽錯誤", f"預覽失敗: {str(e)}")
+    
+    def _compute_preview(self, sub_regions, params: FlightParameters, sub_count: int,
+                         flight_mode: str, reduce_overlap: bool, center_lat: float,
+                         seq: Optional[int] = None):
+        """
+        生成各子區域航點並計算LOITER時間（不觸碰Tk元件，只在預覽執行器的工作執行緒執行）
+
+        center_lat: 距離計算的參考緯度
+        seq: 背景預覽的序號；每個子區域開始前檢查，已有較新的預覽時提前結束並返回None。
+             匯出前的同步計算不帶序號、必定算完；它與背景預覽排在同一個工作執行緒，
+             被它取代的背景預覽會先在子區域之間結束，兩者不會同時使用避障器狀態
+        """
+        self.waypoint_generator.collision_avoidance.set_reference_lat(center_lat)
+        if self.obstacle_ui_extension:
+            self.obstacle_ui_extension.obstacle_manager.set_reference_lat(center_lat)
+        
+        waypoint_results = []
+        loiter_times = []
+        prev_waypoints = None
+        
+        for idx, region_corners in enumerate(sub_regions):
+            # 滑桿拖動中會不斷發出新的預覽，過時的計算不必做完（結果也會被捨棄）
+            if seq is not None and seq != self._preview_seq:
+                return None
+            
+            # 確定起始方向
+            start_from_left = (idx % 2 == 0) if reduce_overlap else True
+            
+            # 計算LOITER時間（智能避撞模式）
+            loiter_time = 0.0
+            if flight_mode == "智能避撞" and idx > 0 and prev_waypoints:
+                # 計算需要等待前一台離開安全範圍的時間
+                loiter_time = self.waypoint_generator.collision_avoidance.calculate_loiter_delay(
+                    prev_waypoints, region_corners[0], params.speed
                 )
+                loiter_time += idx * 5.0  # 額外錯開時間
+            
+            loiter_times.append(loiter_time)
+            
+            # 生成完整任務航點
+            waypoint_lines, waypoints = self.waypoint_generator.generate_complete_mission(
+                region_corners, params, idx, sub_count, start_from_left, loiter_time
+            )
 
-                # 應用障礙物避讓（如果有障礙物UI擴展）
-                if self.obstacle_ui_extension and waypoints:
-                    waypoints = self.obstacle_ui_extension.apply_obstacle_avoidance(waypoints, region_corners)
+            # 應用障礙物避讓（如果有障礙物UI擴展）
+            if self.obstacle_ui_extension and waypoints:
+                waypoints = self.obstacle_ui_extension.apply_obstacle_avoidance(waypoints, region_corners)
 
-                    # 重新生成避障後的航點文件（修復導出問題）
-                    waypoint_lines = self.waypoint_generator.waypoints_to_qgc_format(
-                        waypoints, params, idx, sub_count, loiter_time
-                    )
+                # 重新生成避障後的航點文件（修復導出問題）
+                waypoint_lines = self.waypoint_generator.waypoints_to_qgc_format(
+                    waypoints, params, idx, sub_count, loiter_time
+                )
 
-                waypoint_results.append((waypoint_lines, waypoints, loiter_time))
-                prev_waypoints = waypoints
-                
+            waypoint_results.append((waypoint_lines, waypoints, loiter_time))
+            prev_waypoints = waypoints
+        
+        return waypoint_results, loiter_times
+    
+    def _snapshot_ui_state(self) -> dict:
+        """讀取預覽用到的Tk變數（每個變數只跨一次Tcl邊界）"""
+        return {
+            'sub_count': self.sub_var.get(),
+            'spacing_m': self.region_spacing_var.get(),
+            'flight_mode': self.flight_mode_var.get(),
+            'reduce_overlap': self.reduce_overlap_var.get(),
+            'show_fill': self.show_region_fill_var.get(),
+            'alpha': self.region_alpha_var.get(),
+            'show_waypoints': self.show_waypoints_var.get(),
+        }
+    
+    def _poll_preview(self, seq: int, future, ui: dict):
+        """在主執行緒等待背景預覽完成；已有較新的預覽時捨棄此結果"""
+        if seq != self._preview_seq:
+            future.cancel()
+            return
+        if not future.done():
+            self.after(20, self._poll_preview, seq, future, ui)
+            return
+        
+        try:
+            waypoint_results, loiter_times = future.result()
+            self._apply_preview(waypoint_results, loiter_times, ui)
+        except Exception as e:
+            logger.error("預覽路徑失敗: %s", e)
+            messagebox.showerror("預覽錯誤", f"預覽失敗: {str(e)}")
+    
+    def _apply_preview(self, waypoint_results, loiter_times: List[float], ui: dict):
+        """繪製預覽結果並儲存供匯出使用（主執行緒）"""
+        self._draw_waypoint_results(waypoint_results, ui['show_waypoints'])
+        
+        # 更新LOITER時間顯示
+        self.loiter_times = loiter_times
+        self.update_loiter_display(ui['spacing_m'])
+        
+        # 儲存結果供匯出使用
+        self.current_waypoint_results = waypoint_results
+        self.set_status()
+        
+        logger.info("預覽完成，共%d個子區域，飛行模式：%s，間隔：%s公尺",
+                    len(waypoint_results), ui['flight_mode'], ui['spacing_m'])
+    
+    def _draw_waypoint_results(self, waypoint_results, show_waypoints: bool):
+        """繪製各子區域的航線與起終點標記"""
+        # 所有區域的路徑與標記在同一批次繪製，畫布只重排重繪一次
+        with self._map_batch():
+            for idx, (_, waypoints, loiter_time) in enumerate(waypoint_results):
                 # 繪製路徑
                 if waypoints:
                     self.draw_flight_paths(waypoints, idx)
                     
                     # 繪製起終點標記
-                    if self.show_waypoints_var.get():
+                    if show_waypoints:
                         self.draw_start_end_markers_with_time(waypoints, idx, loiter_time)
-            
-            # 更新LOITER時間顯示
-            self.loiter_times = loiter_times
-            self.update_loiter_display()
-            
-            # 儲存結果供匯出使用
-            self.current_waypoint_results = waypoint_results
-            
-            logger.info(f"預覽完成，共{len(sub_regions)}個子區域，飛行模式：{flight_mode}，間隔：{spacing_m}公尺")
-            
+    
+    def redraw_preview(self):
+        """
+        只重繪航線與起終點標記（航線寬度、顯示選項等外觀設定改變時使用）
+
+        沿用上次預覽的航點結果，不重新生成航點、計算避撞與避障；
+        尚無有效結果（預覽進行中或已被清除）時才排程完整預覽。
+        """
+        if not self.current_waypoint_results:
+            self.schedule_preview_update()
+            return
+        
+        try:
+            self.clear_paths()
+            self.clear_start_end_markers()
+            self._draw_waypoint_results(self.current_waypoint_results,
+                                        self.show_waypoints_var.get())
         except Exception as e:
-            logger.error(f"預覽路徑失敗: {e}")
-            messagebox.showerror("預覽錯誤", f"預覽失敗: {str(e)}")
+            logger.warning("重繪預覽失敗: %s", e)
     
-    def update_loiter_display(self):
+    def update_loiter_display(self, spacing_m: float):
         """更新LOITER時間顯示"""
         if not self.loiter_times:
             return
         
-        spacing_m = self.region_spacing_var.get()
         display_text = f"各區域等待時間 (間隔:{spacing_m}m):\n"
         for idx, loiter_time in enumerate(self.loiter_times):
             display_text += f"區域 {idx+1}: {loiter_time:.1f}秒\n"
@@ -758,60 +1065,92 @@ class DronePathPlannerApp(tk.Tk):
             self.end_markers.append(end_marker)
             
         except Exception as e:
-            logger.error(f"繪製起終點標記失敗: {e}")
+            logger.error("繪製起終點標記失敗: %s", e)
     
-    def draw_sub_regions(self, sub_regions: List[List[Tuple[float, float]]]):
+    def draw_sub_regions(self, sub_regions: List[List[Tuple[float, float]]], ui: dict):
         """繪製子區域"""
         try:
-            show_fill = self.show_region_fill_var.get()
-            alpha = self.region_alpha_var.get()
+            show_fill = ui['show_fill']
+            alpha = ui['alpha']
+            draw_fill = show_fill and alpha > 0
+            
+            # 迴圈不變量先取出
+            set_path = self.map.set_path
+            border_color = Config.REGION_BORDER_COLOR
+            border_width = Config.REGION_BORDER_WIDTH
+            self.drawn_sub_regions = sub_regions
             
             for idx, region in enumerate(sub_regions):
-                # 繪製邊框
-                border = self.map.set_path(
-                    region + [region[0]],
-                    color=Config.REGION_BORDER_COLOR,
-                    width=Config.REGION_BORDER_WIDTH
+                # 繪製邊框（以解包一次建立封閉環，不經中間串列）
+                border = set_path(
+                    [*region, region[0]],
+                    color=border_color,
+                    width=border_width
                 )
                 self.region_overlays.append(border)
                 
                 # 繪製填充（如果啟用）
-                if show_fill and alpha > 0:
-                    try:
-                        base_color = Config.REGION_FILL_COLORS[idx % len(Config.REGION_FILL_COLORS)]
-                        fill_color = self.blend_with_white(base_color, alpha)
-                        
-                        polygon = self.map.set_polygon(
-                            region,
-                            fill_color=fill_color,
-                            outline_color=fill_color,
-                            border_width=0
-                        )
-                        self.region_overlays.append(polygon)
-                    except Exception as e:
-                        logger.warning(f"繪製區域填充失敗: {e}")
+                if draw_fill:
+                    self._draw_region_fill(idx, region, alpha)
                         
         except Exception as e:
-            logger.error(f"繪製子區域失敗: {e}")
+            logger.error("繪製子區域失敗: %s", e)
     
-    def blend_with_white(self, hex_color: str, alpha_percent: int) -> str:
-        """將顏色與白色混合以模擬透明度"""
+    def _draw_region_fill(self, idx: int, region: List[Tuple[float, float]], alpha: int):
+        """繪製單一子區域的底色"""
         try:
-            hex_color = hex_color.lstrip('#')
-            r = int(hex_color[0:2], 16)
-            g = int(hex_color[2:4], 16)
-            b = int(hex_color[4:6], 16)
-            
-            alpha = max(0, min(100, alpha_percent)) / 100.0
+            fill_color = self.blend_rgb_with_white(
+                _PALETTE_RGB[idx % _NUM_PALETTE], int(alpha))
             
-            # 與白色混合
-            r2 = int(alpha * r + (1 - alpha) * 255)
-            g2 = int(alpha * g + (1 - alpha) * 255)
-            b2 = int(alpha * b + (1 - alpha) * 255)
+            polygon = self.map.set_polygon(
+                region,
+                fill_color=fill_color,
+                outline_color=fill_color,
+                border_width=0
+            )
+            self.region_overlays.append(polygon)
+            self.region_fill_overlays.append(polygon)
+        except Exception as e:
+            logger.warning("繪製區域填充失敗: %s", e)
+    
+    def redraw_region_fills(self):
+        """只重繪子區域底色，邊框與航點維持不變"""
+        try:
+            if self.region_fill_overlays:
+                old_fills = set(self.region_fill_overlays)
+                self._delete_map_objects(self.region_fill_overlays)
+                self.region_overlays = [o for o in self.region_overlays
+                                        if o not in old_fills]
+                self.region_fill_overlays.clear()
             
-            return f"#{r2:02X}{g2:02X}{b2:02X}"
-        except Exception:
-            return hex_color
+            alpha = self.region_alpha_var.get()
+            if self.show_region_fill_var.get() and alpha > 0:
+                for idx, region in enumerate(self.drawn_sub_regions):
+                    self._draw_region_fill(idx, region, alpha)
+        except Exception as e:
+            logger.warning("重繪區域底色失敗: %s", e)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=1024)
+    def blend_rgb_with_white(rgb: Tuple[int, int, int], alpha_percent: int) -> str:
+        """將已解析的 (r, g, b) 與白色混合，返回十六進位顏色字串"""
+        r, g, b = rgb
+        alpha_percent = max(0, min(100, alpha_percent))
+        
+        # 完全透明與完全不透明不需混合運算
+        if alpha_percent == 0:
+            return "#FFFFFF"
+        if alpha_percent == 100:
+            return f"#{r:02X}{g:02X}{b:02X}"
+        
+        alpha = alpha_percent / 100.0
+        
+        # 與白色混合
+        r2 = int(alpha * r + (1 - alpha) * 255)
+        g2 = int(alpha * g + (1 - alpha) * 255)
+        b2 = int(alpha * b + (1 - alpha) * 255)
+        
+        return f"#{r2:02X}{g2:02X}{b2:02X}"
     
     def draw_flight_paths(self, waypoints: List[Tuple[float, float]], region_idx: int):
         """繪製飛行路徑"""
@@ -819,20 +1158,42 @@ class DronePathPlannerApp(tk.Tk):
             if len(waypoints) < 2:
                 return
             
-            color = Config.PATH_COLORS[region_idx % len(Config.PATH_COLORS)]
+            color = _PATH_COLORS[region_idx % _NUM_PATH_COLORS]
             path_width = max(1, int(self.modern_sliders['path_width'].get()))
             
-            # 繪製連續的路徑段
-            for i in range(len(waypoints) - 1):
-                path = self.map.set_path(
-                    [waypoints[i], waypoints[i + 1]],
-                    color=color,
-                    width=path_width
-                )
-                self.paths.append(path)
+            # 整條航線以單一折線繪製（每個區域只建立一個畫布物件）
+            path = self.map.set_path(
+                list(waypoints),
+                color=color,
+                width=path_width
+            )
+            self.map.canvas.addtag_withtag(_FLIGHT_PATH_TAG, path.canvas_line)
+            self.paths.append(path)
+            self.flight_paths.append(path)
                 
         except Exception as e:
-            logger.error(f"繪製飛行路徑失敗: {e}")
+            logger.error("繪製飛行路徑失敗: %s", e)
+    
+    @staticmethod
+    def _write_text_file(file_path: str, content: str):
+        """以UTF-8寫入文字檔"""
+        Path(file_path).write_text(content, encoding='utf-8')
+    
+    @staticmethod
+    def _write_waypoint_file(file_path: str, waypoint_lines: List[str]):
+        """
+        寫入航點檔
+
+        航點行都是數字與Tab組成的ASCII，預先編碼後以二進位寫入，
+        不經過文字模式的編碼器；換行與文字模式相同使用 os.linesep。
+        含非ASCII字元（例如中文註解）時退回文字模式。
+        """
+        try:
+            payload = os.linesep.join(waypoint_lines).encode('ascii')
+        except UnicodeEncodeError:
+            DronePathPlannerApp._write_text_file(file_path, "\n".join(waypoint_lines))
+            return
+        Path(file_path).write_bytes(payload)
     
     def export_waypoints(self):
         """匯出航點 - 整合智能避撞功能"""
@@ -843,15 +1204,21 @@ class DronePathPlannerApp(tk.Tk):
             
             # 如果沒有預覽結果，先執行預覽
             if not self.current_waypoint_results:
-                self.preview_paths()
+                self.preview_paths(background=False)
             
-            if not self.current_waypoint_results:
+            # 預覽結果在匯出期間只取用一次
+            results = self.current_waypoint_results
+            if not results:
                 messagebox.showwarning("錯誤", "無法生成航點")
                 return
             
+            # 匯出期間用到的介面變數與參數只讀取一次
             sub_count = self.sub_var.get()
             flight_mode = self.flight_mode_var.get()
             spacing_m = self.region_spacing_var.get()
+            spacing_suffix = f"_gap{spacing_m:.1f}m" if spacing_m > 0 else ""
+            obstacle_count = (len(self.obstacle_ui_extension.obstacle_manager.obstacles)
+                              if self.obstacle_ui_extension else 0)
             
             if sub_count > 1:
                 # 多個檔案匯出
@@ -859,62 +1226,59 @@ class DronePathPlannerApp(tk.Tk):
                 if not dir_path:
                     return
                 
+                params = self.get_flight_parameters()
+                altitude = params.altitude
+                rtl_increment = Config.RTL_ALTITUDE_INCREMENT
+                
+                # 單次走訪預覽結果：同時決定各無人機的檔案與簡報中的區域計劃
                 exported_files = []
-                for idx, (waypoint_lines, _, loiter_time) in enumerate(self.current_waypoint_results, start=1):
+                file_lines = []
+                region_plans = []
+                mode_suffix = "_smart" if flight_mode == "智能避撞" else "_sync"
+                name_suffix = f"{mode_suffix}{spacing_suffix}.waypoints"
+                for idx, (waypoint_lines, _, loiter_time) in enumerate(results, start=1):
+                    region_plans.append(_BRIEFING_REGION_TEMPLATE.format(
+                        idx=idx, loiter_time=loiter_time,
+                        rtl_alt=altitude + (sub_count - idx) * rtl_increment))
+                    
                     if not waypoint_lines:
                         continue
                     
                     # 檔案名稱
-                    mode_suffix = "_smart" if flight_mode == "智能避撞" else "_sync"
-                    spacing_suffix = f"_gap{spacing_m:.1f}m" if spacing_m > 0 else ""
-                    file_name = f"drone_{idx}{mode_suffix}{spacing_suffix}.waypoints"
-                    file_path = os.path.join(dir_path, file_name)
-                    
-                    # 寫入檔案
-                    with open(file_path, 'w', encoding='utf-8') as f:
-                        f.write("\n".join(waypoint_lines))
+                    file_path = os.path.join(dir_path, f"drone_{idx}{name_suffix}")
                     
+                    file_lines.append(waypoint_lines)
                     exported_files.append(file_path)
                 
-                # 生成飛行計劃說明文件
+                # 生成飛行計劃說明文件（簡報內容以範本組成，最後一次寫入檔案）
                 info_file = os.path.join(dir_path, "mission_briefing.txt")
-                with open(info_file, 'w', encoding='utf-8') as f:
-                    f.write("=" * 50 + "\n")
-                    f.write("無人機群飛行任務簡報\n")
-                    f.write("=" * 50 + "\n\n")
-                    f.write(f"飛行模式: {flight_mode}\n")
-                    f.write(f"子區域數量: {sub_count}\n")
-                    f.write(f"安全間距: {Config.SAFETY_DISTANCE_M}公尺\n")
-                    f.write(f"子區域間隔: {spacing_m}公尺\n\n")
-                    
-                    params = self.get_flight_parameters()
-                    f.write("飛行參數:\n")
-                    f.write(f"  - 飛行高度: {params.altitude:.1f}公尺\n")
-                    f.write(f"  - 飛行速度: {params.speed:.1f}公尺/秒\n")
-                    f.write(f"  - 航線間距: {params.spacing:.1f}公尺\n")
-                    f.write(f"  - 掃描角度: {params.angle:.1f}度\n\n")
-                    
-                    if self.obstacle_ui_extension and len(self.obstacle_ui_extension.obstacle_manager.obstacles) > 0:
-                        f.write(f"障礙物數量: {len(self.obstacle_ui_extension.obstacle_manager.obstacles)} 個\n\n")
-                    
-                    f.write("各區域執行計劃:\n")
-                    for idx, (_, _, loiter_time) in enumerate(self.current_waypoint_results, start=1):
-                        f.write(f"\n區域 {idx}:\n")
-                        f.write(f"  - LOITER等待: {loiter_time:.1f}秒\n")
-                        rtl_alt = params.altitude + (sub_count - idx) * Config.RTL_ALTITUDE_INCREMENT
-                        f.write(f"  - RTL高度: {rtl_alt:.1f}公尺\n")
-                        f.write(f"  - 任務特點: 完整循環返回起點\n")
-                    
-                    f.write("\n" + "=" * 50 + "\n")
-                    f.write("任務執行注意事項:\n")
-                    f.write("1. 確保所有無人機電池充足\n")
-                    f.write("2. 檢查GPS信號強度\n")
-                    f.write("3. 確認安全區域無障礙物\n")
-                    f.write("4. 監控LOITER等待狀態\n")
-                    f.write("5. RTL時注意高度分層\n")
-                    f.write(f"6. 子區域間隔設定: {spacing_m}公尺\n")
+                context = {
+                    'rule': _BRIEFING_RULE,
+                    'flight_mode': flight_mode,
+                    'sub_count': sub_count,
+                    'safety_distance': Config.SAFETY_DISTANCE_M,
+                    'spacing_m': spacing_m,
+                    'altitude': altitude,
+                    'speed': params.speed,
+                    'spacing': params.spacing,
+                    'angle': params.angle,
+                }
+                parts = [_BRIEFING_HEADER_TEMPLATE.format_map(context)]
+                
+                if obstacle_count:
+                    parts.append(_BRIEFING_OBSTACLE_TEMPLATE.format(obstacle_count=obstacle_count))
+                
+                parts.append("各區域執行計劃:\n")
+                parts.extend(region_plans)
+                parts.append(_BRIEFING_FOOTER_TEMPLATE.format_map(context))
+                
+                # 寫入檔案（航點檔與簡報同時寫入，任一失敗時例外會傳遞出來）
+                with ThreadPoolExecutor(max_workers=min(8, len(exported_files) + 1)) as executor:
+                    briefing_future = executor.submit(self._write_text_file, info_file, "".join(parts))
+                    list(executor.map(self._write_waypoint_file, exported_files, file_lines))
+                    briefing_future.result()
                 
-                messagebox.showinfo("匯出成功", 
+                success_message = (
                     f"已匯出{len(exported_files)}個任務檔案至:\n{dir_path}\n\n"
                     f"飛行模式: {flight_mode}\n"
                     f"子區域間隔: {spacing_m}公尺\n"
@@ -922,7 +1286,6 @@ class DronePathPlannerApp(tk.Tk):
                 
             else:
                 # 單個檔案匯出
-                spacing_suffix = f"_gap{spacing_m:.1f}m" if spacing_m > 0 else ""
                 default_name = f"drone_mission{spacing_suffix}.waypoints"
                 file_path = filedialog.asksaveasfilename(
                     defaultextension=".waypoints",
@@ -933,40 +1296,35 @@ class DronePathPlannerApp(tk.Tk):
                 if not file_path:
                     return
                 
-                waypoint_lines = self.current_waypoint_results[0][0]
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write("\n".join(waypoint_lines))
+                waypoint_lines = results[0][0]
+                self._write_waypoint_file(file_path, waypoint_lines)
                 
-                messagebox.showinfo("匯出成功", f"已儲存至:\n{file_path}")
+                success_message = f"已儲存至:\n{file_path}"
             
-            logger.info(f"航點匯出完成，飛行模式：{flight_mode}，間隔：{spacing_m}公尺")
+            logger.info("航點匯出完成，飛行模式：%s，間隔：%s公尺", flight_mode, spacing_m)
+            
+            # 成功訊息排到閒置時顯示，先讓事件迴圈處理完排隊中的重繪
+            self.after_idle(functools.partial(messagebox.showinfo, "匯出成功", success_message))
             
         except Exception as e:
-            logger.error(f"匯出航點失敗: {e}")
+            logger.error("匯出航點失敗: %s", e)
             messagebox.showerror("匯出錯誤", f"匯出失敗: {str(e)}")
     
     def clear_paths(self):
         """清除路徑"""
         try:
-            for path in self.paths:
-                try:
-                    path.delete()
-                except Exception:
-                    pass
+            self._delete_map_objects(self.paths)
             self.paths.clear()
+            self.flight_paths.clear()
             logger.info("路徑已清除")
         except Exception as e:
-            logger.warning(f"清除路徑失敗: {e}")
+            logger.warning("清除路徑失敗: %s", e)
     
     def clear_corners(self):
         """清除角點"""
         try:
             # 清除標記
-            for marker in self.markers:
-                try:
-                    marker.delete()
-                except Exception:
-                    pass
+            self._delete_map_objects(self.markers)
             self.markers.clear()
             self.corners.clear()
             
@@ -986,7 +1344,20 @@ class DronePathPlannerApp(tk.Tk):
             logger.info("角點已清除")
             
         except Exception as e:
-            logger.error(f"清除角點失敗: {e}")
+            logger.error("清除角點失敗: %s", e)
+    
+    def _set_tk_variables(self, assignments):
+        """
+        以單次Tcl呼叫設定多個Tk變數
+
+        Args:
+            assignments: [(tk變數, 值), ...]，效果等同逐一呼叫 var.set(值)
+        """
+        flat = []
+        for var, value in assignments:
+            flat.append(str(var))
+            flat.append(value)
+        self.tk.call('foreach', ('name', 'value'), tuple(flat), 'set $name $value')
     
     def reset_all(self):
         """重設所有設定"""
@@ -1007,14 +1378,16 @@ class DronePathPlannerApp(tk.Tk):
             self.modern_sliders['alpha'].set(20)
             self.modern_sliders['region_spacing'].set(3.0)  # 重設間隔為3公尺
             
-            # 重設UI變數
-            self.sub_var.set(1)
-            self.reduce_overlap_var.set(True)
-            self.show_region_fill_var.set(False)
-            self.show_waypoints_var.set(True)
-            self.mode_var.set("Add")
-            self.flight_mode_var.set("智能避撞")
-            self.region_spacing_var.set(3.0)
+            # 重設UI變數（一次Tcl呼叫設定全部）
+            self._set_tk_variables((
+                (self.sub_var, 1),
+                (self.reduce_overlap_var, True),
+                (self.show_region_fill_var, False),
+                (self.show_waypoints_var, True),
+                (self.mode_var, "Add"),
+                (self.flight_mode_var, "智能避撞"),
+                (self.region_spacing_var, 3.0),
+            ))
             
             # 清除障礙物
             if self.obstacle_ui_extension:
@@ -1024,15 +1397,16 @@ class DronePathPlannerApp(tk.Tk):
             messagebox.showinfo("重設完成", "所有設定已重設為預設值")
             
         except Exception as e:
-            logger.error(f"重設失敗: {e}")
+            logger.error("重設失敗: %s", e)
             messagebox.showerror("重設錯誤", f"重設失敗: {str(e)}")
     
     def on_closing(self):
         """程式關閉事件"""
         try:
             logger.info("程式正在關閉...")
+            self._preview_executor.shutdown(wait=False, cancel_futures=True)
             self.quit()
             self.destroy()
         except Exception as e:
-            logger.error(f"程式關閉失敗: {e}")
+            logger.error("程式關閉失敗: %s", e)
             self.destroy()
\ No newline at end of file
@@ -3,7 +3,12 @@
 負責地圖相關操作，包括初始化、服務器切換等
 """
 
+import json
 import threading
+import urllib.request
+from pathlib import Path
+from typing import Callable, Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
 
 from config import Config
 from logger_utils import logger
@@ -15,9 +20,21 @@ from logger_utils import logger
 class MapManager:
     """地圖管理器 - 負責地圖相關操作"""
     
-    def __init__(self, map_widget):
+    PROBE_TIMEOUT_S = 1.5  # 單一伺服器探測逾時
+    PROBE_POLL_MS = 100    # 主執行緒檢查探測結果的間隔
+    LAST_SERVER_FILE = Path.home() / '.drone_planner' / 'last_server.json'  # 上次可用的伺服器
+    
+    def __init__(self, map_widget, on_server_changed: Optional[Callable[[int], None]] = None):
+        """
+        Args:
+            map_widget: 地圖元件
+            on_server_changed: 探測後自動切換伺服器時的回呼（主執行緒，參數為伺服器索引）
+        """
         self.map = map_widget
+        self.on_server_changed = on_server_changed
         self.current_server = 0
+        self._probe_thread = None
+        self._probe_result = None
         
     def initialize_map(self):
         """初始化地圖"""
@@ -25,17 +42,24 @@ class MapManager:
             # 直接同步載入地圖（更可靠）
             success = False
 
-            # 嘗試載入地圖伺服器
-            for i, (name, url, max_zoom) in enumerate(Config.MAP_SERVERS):
+            # 嘗試載入地圖伺服器（上次確認可用的伺服器優先）
+            order = list(range(len(Config.MAP_SERVERS)))
+            last_server = self._load_last_server()
+            if last_server is not None:
+                order.remove(last_server)
+                order.insert(0, last_server)
+
+            for i in order:
+                name, url, max_zoom = Config.MAP_SERVERS[i]
                 try:
-                    logger.info(f"嘗試載入地圖伺服器: {name}")
+                    logger.info("嘗試載入地圖伺服器: %s", name)
                     self.map.set_tile_server(url, max_zoom=max_zoom)
                     self.current_server = i
-                    logger.info(f"成功載入地圖伺服器: {name}")
+                    logger.info("成功載入地圖伺服器: %s", name)
                     success = True
                     break
                 except Exception as e:
-                    logger.warning(f"地圖伺服器 {name} 載入失敗: {e}")
+                    logger.warning("地圖伺服器 %s 載入失敗: %s", name, e)
                     continue
 
             if not success:
@@ -46,10 +70,96 @@ class MapManager:
             # 設定預設位置
             self.map.set_position(*Config.DEFAULT_POSITION)
             self.map.set_zoom(Config.DEFAULT_ZOOM)
-            logger.info(f"地圖位置設定完成: {Config.DEFAULT_POSITION}, 縮放: {Config.DEFAULT_ZOOM}")
+            logger.info("地圖位置設定完成: %s, 縮放: %s", Config.DEFAULT_POSITION, Config.DEFAULT_ZOOM)
+
+            # 背景同時探測所有伺服器，目前伺服器無回應時改用最快回應者
+            if success:
+                self.start_server_probe()
 
         except Exception as e:
-            logger.error(f"地圖初始化失敗: {e}", exc_info=True)
+            logger.error("地圖初始化失敗: %s", e, exc_info=True)
+    
+    def start_server_probe(self):
+        """
+        在背景執行緒同時探測所有地圖伺服器
+
+        set_tile_server 不會檢查網路，逐一嘗試時第一個伺服器永遠「成功」。
+        探測在背景進行，不延遲啟動；結果由主執行緒以 after() 輪詢取得。
+        """
+        if self._probe_thread is not None and self._probe_thread.is_alive():
+            return
+        
+        self._probe_result = None
+        self._probe_thread = threading.Thread(target=self._probe_servers, daemon=True)
+        self._probe_thread.start()
+        self.map.after(self.PROBE_POLL_MS, self._check_server_probe)
+    
+    @staticmethod
+    def _probe_url(url: str, timeout: float) -> bool:
+        """對範例瓦片發送HEAD請求，回應狀態碼小於400即視為可用"""
+        try:
+            # 網址模板含未預期的佔位符時也視為不可用，不讓例外中斷整批探測
+            sample_url = url.format(z=1, x=1, y=1)
+            request = urllib.request.Request(
+                sample_url, method='HEAD', headers={'User-Agent': 'DronePathPlanner'})
+            with urllib.request.urlopen(request, timeout=timeout) as response:
+                return response.status < 400
+        except Exception:
+            return False
+    
+    def _probe_servers(self):
+        """同時探測所有伺服器（背景執行緒），依回應先後記錄可用伺服器索引"""
+        reachable = []
+        with ThreadPoolExecutor(max_workers=len(Config.MAP_SERVERS)) as executor:
+            futures = {executor.submit(self._probe_url, url, self.PROBE_TIMEOUT_S): i
+                       for i, (_, url, _) in enumerate(Config.MAP_SERVERS)}
+            for future in as_completed(futures):
+                if future.result():
+                    reachable.append(futures[future])
+        self._probe_result = reachable
+    
+    def _check_server_probe(self):
+        """主執行緒：探測完成後視需要切換伺服器"""
+        if self._probe_thread is not None and self._probe_thread.is_alive():
+            self.map.after(self.PROBE_POLL_MS, self._check_server_probe)
+            return
+        
+        reachable = self._probe_result or []
+        unreachable = [name for i, (name, _, _) in enumerate(Config.MAP_SERVERS)
+                       if i not in reachable]
+        if unreachable:
+            logger.info("地圖伺服器無回應: %s", ', '.join(unreachable))
+        
+        if not reachable:
+            return
+        if self.current_server in reachable:
+            self._save_last_server(self.current_server)
+            return
+        
+        # 目前伺服器無回應，改用最快回應的伺服器，並通知介面同步選單
+        self.switch_map_server(reachable[0])
+        if self.on_server_changed is not None and self.current_server == reachable[0]:
+            self.on_server_changed(self.current_server)
+    
+    def _load_last_server(self):
+        """讀取上次可用的伺服器索引，檔案不存在或內容無效時返回None"""
+        try:
+            with open(self.LAST_SERVER_FILE, 'r', encoding='utf-8') as f:
+                index = json.load(f).get('server_index')
+        except (OSError, ValueError, AttributeError):
+            return None
+        if isinstance(index, int) and 0 <= index < len(Config.MAP_SERVERS):
+            return index
+        return None
+    
+    def _save_last_server(self, server_index: int):
+        """記錄可用的伺服器索引，下次啟動優先使用"""
+        try:
+            self.LAST_SERVER_FILE.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.LAST_SERVER_FILE, 'w', encoding='utf-8') as f:
+                json.dump({'server_index': server_index}, f)
+        except OSError as e:
+            logger.warning("儲存地圖伺服器設定失敗: %s", e)
     
     def switch_map_server(self, server_index: int):
         """切換地圖伺服器"""
@@ -58,6 +168,7 @@ class MapManager:
                 name, url, max_zoom = Config.MAP_SERVERS[server_index]
                 self.map.set_tile_server(url, max_zoom=max_zoom)
                 self.current_server = server_index
-                logger.info(f"切換到地圖伺服器: {name}")
+                self._save_last_server(server_index)
+                logger.info("切換到地圖伺服器: %s", name)
         except Exception as e:
-            logger.error(f"切換地圖伺服器失敗: {e}")
\ No newline at end of file
+            logger.error("切換地圖伺服器失敗: %s", e)
\ No newline at end of file
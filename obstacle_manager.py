@@ -4,9 +4,13 @@
 """
 
 import math
+import bisect
+import logging
+import statistics
+from itertools import chain, islice
 from typing import List, Tuple, Optional
 from logger_utils import logger
-from astar_pathfinding import GridMap, AStarPathfinder
+from astar_pathfinding import GridMap, AStarPathfinder, HierarchicalAStar
 
 try:
     from config import Config
@@ -14,6 +18,12 @@ except ImportError:
     class Config:
         EARTH_RADIUS_M = 6378137.0
 
+# 每度約111111公尺（平面近似）
+_EARTH_RADIUS_M = 111111.0
+
+# 障礙物數量達此值時，最近障礙物查詢改用中心緯度排序索引（數量少時直接掃描較快）
+NEAREST_INDEX_MIN_OBSTACLES = 32
+
 class Obstacle:
     """障礙物資料類 - 多邊形版本"""
     def __init__(self, corners: List[Tuple[float, float]], safe_distance: float = 1.0):
@@ -23,10 +33,62 @@ class Obstacle:
         self.polygon = None  # 障礙物多邊形顯示
         self.safe_polygon = None  # 安全範圍多邊形顯示
         self.is_complete = False  # 是否已完成打點
+        self._expanded_cache = {}  # 擴展距離 -> 擴展後角點（僅完成打點後快取）
+        self._center = None  # 角點平均中心（僅完成打點後快取）
+        self._columns = None  # (緯度序列, 經度序列)（僅完成打點後快取）
+        self._bounds_cache = {}  # 擴展距離 -> 擴展後外接矩形（僅完成打點後快取）
 
     def add_corner(self, lat: float, lon: float):
         """添加角點"""
         self.corners.append((lat, lon))
+        self.invalidate()
+
+    def remove_last_corner(self) -> Optional[Tuple[float, float]]:
+        """刪除最後一個角點，返回被刪除的角點（無角點時為None）"""
+        if not self.corners:
+            return None
+        corner = self.corners.pop()
+        self.invalidate()
+        return corner
+
+    def invalidate(self):
+        """清除幾何快取（直接修改corners後須呼叫）"""
+        self._expanded_cache.clear()
+        self._bounds_cache.clear()
+        self._center = None
+        self._columns = None
+
+    def get_corner_columns(self) -> Tuple[Tuple[float, ...], Tuple[float, ...]]:
+        """
+        取得角點的緯度、經度欄位 (lats, lons)
+        中心、範圍等逐欄計算直接使用，不必每次從(lat, lon)組中拆出
+        """
+        if self.is_complete and self._columns is not None:
+            return self._columns
+
+        if self.corners:
+            lats, lons = zip(*self.corners)
+        else:
+            lats, lons = (), ()
+        columns = (lats, lons)
+        if self.is_complete:
+            self._columns = columns
+        return columns
+
+    def get_center(self) -> Tuple[float, float]:
+        """取得角點平均中心（無角點時為 (0, 0)）"""
+        if self.is_complete and self._center is not None:
+            return self._center
+
+        if not self.corners:
+            return (0, 0)
+
+        lats, lons = self.get_corner_columns()
+        n = len(lats)
+        center = (sum(lats) / n, sum(lons) / n)
+        if self.is_complete:
+            self._center = center
+        return center
 
     def get_expanded_corners(self, distance_m: float) -> List[Tuple[float, float]]:
         """
@@ -36,43 +98,78 @@ class Obstacle:
         if len(self.corners) < 3:
             return self.corners
 
+        # 完成打點後角點不再變動，同一距離的結果直接沿用（建圖、碰撞檢查會反覆呼叫）
+        if self.is_complete:
+            cached = self._expanded_cache.get(distance_m)
+            if cached is not None:
+                return list(cached)
+
+        corners = self.corners
+
         # 使用簡單的向外偏移算法
+        # 單次走訪：前一條邊的單位向量沿用為下一個頂點的v1，不重複正規化
         expanded = []
-        n = len(self.corners)
+        n = len(corners)
+        normalize = self._normalize_vector
+        earth_radius_m = _EARTH_RADIUS_M
 
-        for i in range(n):
-            prev_idx = (i - 1) % n
-            next_idx = (i + 1) % n
+        prev = corners[-1]
+        curr = corners[0]
+        v1 = normalize((curr[0] - prev[0], curr[1] - prev[1]))
 
-            curr = self.corners[i]
-            prev = self.corners[prev_idx]
-            next = self.corners[next_idx]
+        for i in range(n):
+            next = corners[(i + 1) % n]
 
             # 計算兩條邊的法向量
-            v1 = self._normalize_vector(
-                self._vector_subtract(curr, prev)
-            )
-            v2 = self._normalize_vector(
-                self._vector_subtract(next, curr)
-            )
+            v2 = normalize((next[0] - curr[0], next[1] - curr[1]))
 
             # 計算角平分線方向(向外)
-            bisector = self._normalize_vector(
-                (v1[0] + v2[0], v1[1] + v2[1])
-            )
+            bisector = normalize((v1[0] + v2[0], v1[1] + v2[1]))
 
-            # 計算法向量(順時針旋轉90度)
-            normal = (-bisector[1], bisector[0])
+            # 計算法向量(順時針旋轉90度)，沿其平面偏移向外擴展（小範圍足夠精確）
+            dir_lat, dir_lon = -bisector[1], bisector[0]
+            lat, lon = curr
+            expanded.append((
+                lat + (dir_lat * distance_m / earth_radius_m),
+                lon + (dir_lon * distance_m / (earth_radius_m * math.cos(math.radians(lat))))
+            ))
 
-            # 向外擴展
-            expanded_point = self._offset_point(curr, normal, distance_m)
-            expanded.append(expanded_point)
+            curr = next
+            v1 = v2
 
+        if self.is_complete:
+            self._expanded_cache[distance_m] = tuple(expanded)
         return expanded
 
-    def _vector_subtract(self, p1: Tuple[float, float], p2: Tuple[float, float]) -> Tuple[float, float]:
-        """向量減法"""
-        return (p1[0] - p2[0], p1[1] - p2[1])
+    def get_safe_boundary(self, distance_m: float) -> Tuple[Tuple[float, float], ...]:
+        """
+        唯讀版本的 get_expanded_corners
+        完成打點後直接返回快取的tuple，不逐次複製；供內部碰撞、建圖計算使用
+        """
+        if self.is_complete:
+            cached = self._expanded_cache.get(distance_m)
+            if cached is not None:
+                return cached
+
+        return tuple(self.get_expanded_corners(distance_m))
+
+    def get_expanded_bounds(self, distance_m: float) -> Tuple[float, float, float, float]:
+        """
+        獲取擴展後多邊形的外接矩形 (min_lat, max_lat, min_lon, max_lon)
+        用於碰撞檢查前的快速排除
+        """
+        if self.is_complete:
+            cached = self._bounds_cache.get(distance_m)
+            if cached is not None:
+                return cached
+
+        # 轉為欄位序列後逐欄取極值（轉置在C層完成，不逐點索引）
+        lats, lons = zip(*self.get_safe_boundary(distance_m))
+        bounds = (min(lats), max(lats), min(lons), max(lons))
+
+        if self.is_complete:
+            self._bounds_cache[distance_m] = bounds
+        return bounds
 
     def _normalize_vector(self, v: Tuple[float, float]) -> Tuple[float, float]:
         """向量正規化"""
@@ -81,21 +178,6 @@ class Obstacle:
             return (0, 0)
         return (v[0] / length, v[1] / length)
 
-    def _offset_point(self, point: Tuple[float, float], direction: Tuple[float, float],
-                     distance_m: float) -> Tuple[float, float]:
-        """將點沿指定方向偏移指定距離"""
-        lat, lon = point
-        dir_lat, dir_lon = direction
-
-        # 簡單的平面偏移(對於小範圍足夠精確)
-        earth_radius_m = 111111.0
-        cos_lat = math.cos(math.radians(lat))
-
-        new_lat = lat + (dir_lat * distance_m / earth_radius_m)
-        new_lon = lon + (dir_lon * distance_m / (earth_radius_m * cos_lat))
-
-        return (new_lat, new_lon)
-
 
 class ObstacleManager:
     """
@@ -110,10 +192,19 @@ class ObstacleManager:
 
     def __init__(self):
         self.obstacles: List[Obstacle] = []
-        self.earth_radius_m = 111111.0  # 每度約111111公尺
+        self.earth_radius_m = _EARTH_RADIUS_M  # 每度約111111公尺
         self.current_creating_obstacle: Optional[Obstacle] = None
         self.grid_map: Optional[GridMap] = None
         self.pathfinder: Optional[AStarPathfinder] = None
+        self._m_per_lon: Optional[float] = None  # 參考緯度下每度經度的公尺數
+        self._center_index = None  # (建立時的障礙物列表, 排序後的中心緯度, 對應的障礙物位置)
+
+    def set_reference_lat(self, lat: float):
+        """
+        設定作業區參考緯度
+        作業區範圍小，經度縮放可共用同一個cos值，距離計算不必每次算三角函數
+        """
+        self._m_per_lon = _EARTH_RADIUS_M * math.cos(math.radians(lat))
 
     def start_new_obstacle(self, safe_distance: float = 1.0) -> Obstacle:
         """開始創建新障礙物"""
@@ -126,7 +217,7 @@ class ObstacleManager:
         if self.current_creating_obstacle and len(self.current_creating_obstacle.corners) >= 3:
             self.current_creating_obstacle.is_complete = True
             self.obstacles.append(self.current_creating_obstacle)
-            logger.info(f"完成障礙物: {len(self.current_creating_obstacle.corners)}個角點")
+            logger.info("完成障礙物: %d個角點", len(self.current_creating_obstacle.corners))
             self.current_creating_obstacle = None
             return True
         return False
@@ -139,7 +230,7 @@ class ObstacleManager:
         """移除障礙物"""
         if obstacle in self.obstacles:
             self.obstacles.remove(obstacle)
-            logger.info(f"移除障礙物")
+            logger.info("移除障礙物")
             return True
         return False
 
@@ -148,39 +239,57 @@ class ObstacleManager:
         if not self.obstacles:
             return None
 
-        nearest_obs = None
-        min_dist = float('inf')
+        candidates = self._nearby_candidates(coords, threshold_m)
+        if not candidates:
+            return None
 
-        for obs in self.obstacles:
-            if not obs.corners:
-                continue
-            # 計算到障礙物中心的距離
-            center = self._calculate_polygon_center(obs.corners)
-            dist = self.calculate_distance(coords, center)
-            if dist < min_dist:
-                min_dist = dist
-                nearest_obs = obs
+        # 一次計算到所有障礙物中心的距離
+        centers = [obs.get_center() for obs in candidates]
+        distances = self.calculate_distances(coords, centers)
+        nearest_idx = min(range(len(distances)), key=distances.__getitem__)
+        nearest_obs = candidates[nearest_idx]
+        min_dist = distances[nearest_idx]
 
-        if nearest_obs and min_dist < threshold_m:
+        if min_dist < threshold_m:
             self.remove_obstacle(nearest_obs)
             return nearest_obs
         return None
 
-    def _calculate_polygon_center(self, corners: List[Tuple[float, float]]) -> Tuple[float, float]:
-        """計算多邊形中心點"""
-        if not corners:
-            return (0, 0)
-
-        lat_sum = sum(c[0] for c in corners)
-        lon_sum = sum(c[1] for c in corners)
-        n = len(corners)
-
-        return (lat_sum / n, lon_sum / n)
+    def _nearby_candidates(self, coords: Tuple[float, float], threshold_m: float) -> List[Obstacle]:
+        """
+        取得可能在門檻距離內的障礙物（保持原列表順序）
+        距離不小於緯度差換算的公尺數，故只需檢查中心緯度落在門檻範圍內的已完成障礙物
+        """
+        obstacles = self.obstacles
+        if len(obstacles) < NEAREST_INDEX_MIN_OBSTACLES:
+            return [obs for obs in obstacles if obs.corners]
+
+        # 障礙物列表有變動（新增、移除、外部直接修改）時重建索引
+        index = self._center_index
+        if index is None or index[0] != obstacles:
+            entries = sorted((obs.get_center()[0], i) for i, obs in enumerate(obstacles)
+                             if obs.is_complete and obs.corners)
+            index = (list(obstacles), [lat for lat, _ in entries], [i for _, i in entries])
+            self._center_index = index
+        _, center_lats, positions = index
+
+        # 視窗略為放寬，避免換算誤差漏掉邊界上的障礙物；多出的候選仍會精確計算距離
+        lat = coords[0]
+        margin = threshold_m / _EARTH_RADIUS_M * (1 + 1e-9)
+        lo = bisect.bisect_left(center_lats, lat - margin)
+        hi = bisect.bisect_right(center_lats, lat + margin)
+
+        # 未完成的障礙物角點仍可能變動，不納入索引，一律檢查
+        selected = set(positions[lo:hi])
+        selected.update(i for i, obs in enumerate(obstacles)
+                        if not obs.is_complete and obs.corners)
+        return [obstacles[i] for i in sorted(selected)]
 
     def clear_all(self):
         """清除所有障礙物"""
         self.obstacles.clear()
         self.current_creating_obstacle = None
+        self._center_index = None
         logger.info("清除所有障礙物")
 
     def filter_waypoints_with_detour(self, waypoints: List[Tuple[float, float]],
@@ -206,30 +315,34 @@ class ObstacleManager:
 
         # 處理航點路徑
         result_waypoints = [waypoints[0]]  # 保留第一個點
+        # 已加入航點的集合，去重檢查為O(1)，避免在成長中的列表上線性搜尋
+        seen = {waypoints[0]}
 
         for i in range(len(waypoints) - 1):
             current = waypoints[i]
             next_point = waypoints[i + 1]
 
-            # 檢查這段路徑是否穿過障礙物
-            if self._segment_collides_with_obstacles(current, next_point):
-                # 使用A*尋找繞行路徑
-                detour_path = self.pathfinder.find_path(current, next_point)
+            # 檢查這段路徑是否穿過障礙物，穿過時以A*尋找繞行路徑
+            detour_path, is_clear = self.pathfinder.find_detour(current, next_point)
 
+            if not is_clear:
                 if detour_path and len(detour_path) > 2:
                     # 找到繞行路徑，添加中間點（跳過起點，因為已經添加過）
                     result_waypoints.extend(detour_path[1:])
-                    logger.info(f"A*繞行: {i}-{i+1}, 生成{len(detour_path)-2}個中間點")
+                    seen.update(detour_path[1:])
+                    logger.info("A*繞行: %d-%d, 生成%d個中間點", i, i + 1, len(detour_path) - 2)
                 else:
                     # 找不到路徑或路徑是直線，直接添加終點
-                    if next_point not in result_waypoints:
+                    if next_point not in seen:
                         result_waypoints.append(next_point)
+                        seen.add(next_point)
             else:
                 # 無障礙物，直接添加下一個點
-                if next_point not in result_waypoints:
+                if next_point not in seen:
                     result_waypoints.append(next_point)
+                    seen.add(next_point)
 
-        logger.info(f"A*避障完成: {len(waypoints)}點 -> {len(result_waypoints)}點")
+        logger.info("A*避障完成: %d點 -> %d點", len(waypoints), len(result_waypoints))
         return result_waypoints
 
     def _build_grid_map(self, waypoints: List[Tuple[float, float]],
@@ -264,8 +377,11 @@ class ObstacleManager:
             max(lons) + lon_margin
         )
 
-        # 創建柵格地圖（解析度0.5公尺）
-        self.grid_map = GridMap(bounds, resolution=0.5)
+        # 創建柵格地圖（解析度0.5公尺，作業範圍過大時依格數上限放大）
+        resolution = GridMap.resolution_for_bounds(bounds, min_resolution=0.5)
+        if resolution > 0.5:
+            logger.info("作業範圍較大，柵格解析度調整為 %.2fm", resolution)
+        self.grid_map = GridMap(bounds, resolution=resolution)
 
         # 標記作業邊界（如果有提供）
         if boundary_corners and len(boundary_corners) >= 3:
@@ -275,33 +391,14 @@ class ObstacleManager:
         for obs in self.obstacles:
             if obs.is_complete and len(obs.corners) >= 3:
                 # 使用擴展後的安全邊界
-                safe_boundary = obs.get_expanded_corners(obs.safe_distance)
+                safe_boundary = obs.get_safe_boundary(obs.safe_distance)
                 self.grid_map.mark_obstacle(safe_boundary)
-                logger.info(f"標記障礙物: {len(obs.corners)}角點, 安全距離{obs.safe_distance}m")
-
-        # 創建A*尋路器
-        self.pathfinder = AStarPathfinder(self.grid_map)
-        logger.info(f"柵格地圖建立完成: {self.grid_map.grid_width}x{self.grid_map.grid_height}")
+                logger.info("標記障礙物: %d角點, 安全距離%sm", len(obs.corners), obs.safe_distance)
 
-    def _segment_collides_with_obstacles(self, p1: Tuple[float, float],
-                                          p2: Tuple[float, float]) -> bool:
-        """檢查線段是否與障礙物碰撞（使用柵格地圖）"""
-        if not self.grid_map:
-            return False
-
-        # 轉換為柵格座標
-        start_grid = self.grid_map.latlon_to_grid(*p1)
-        end_grid = self.grid_map.latlon_to_grid(*p2)
-
-        # 使用Bresenham算法檢查線段經過的所有格子
-        if hasattr(self.pathfinder, '_bresenham_line'):
-            points = self.pathfinder._bresenham_line(start_grid, end_grid)
-
-            for y, x in points:
-                if not self.grid_map.is_valid(y, x):
-                    return True
-
-        return False
+        # 創建A*尋路器（分層叢集A*，叢集圖在同一地圖的多次繞行間共用）
+        self.pathfinder = HierarchicalAStar(self.grid_map)
+        logger.info("柵格地圖建立完成: %dx%d",
+                    self.grid_map.grid_width, self.grid_map.grid_height)
 
     def _identify_scan_segments(self, waypoints: List[Tuple[float, float]]) -> List[Tuple[str, Tuple[int, int]]]:
         """
@@ -317,33 +414,29 @@ class ObstacleManager:
         if len(waypoints) < 2:
             return []
 
-        segments = []
-
         # 計算所有相鄰點之間的距離
-        distances = []
-        for i in range(len(waypoints) - 1):
-            dist = self.calculate_distance(waypoints[i], waypoints[i + 1])
-            distances.append((i, i + 1, dist))
+        # 未設定參考緯度時，以本批航點平均緯度算一次經度縮放，整批共用
+        m_per_lon = self._m_per_lon
+        if m_per_lon is None:
+            mean_lat = sum(p[0] for p in waypoints) / len(waypoints)
+            m_per_lon = _EARTH_RADIUS_M * math.cos(math.radians(mean_lat))
 
-        if not distances:
-            return []
+        distances = self.calculate_path_distances(waypoints, m_per_lon)
 
-        # 找出距離中位數作為閾值
-        sorted_dists = sorted([d[2] for d in distances])
-        median_dist = sorted_dists[len(sorted_dists) // 2]
-        max_dist = sorted_dists[-1]
+        # 找出距離中位數作為閾值（取較大中位數，與排序後取 n//2 相同）
+        median_dist = statistics.median_high(distances)
+        max_dist = max(distances)
 
         # 閾值: 使用最大距離的50%,確保只識別真正的長掃描線
         threshold = max(median_dist * 0.6, max_dist * 0.5)
 
         # 識別掃描線段
-        for idx_start, idx_end, dist in distances:
-            if dist > threshold:
-                segments.append(("scan", (idx_start, idx_end)))
-            else:
-                segments.append(("turn", (idx_start, idx_end)))
+        segments = [("scan" if dist > threshold else "turn", (i, i + 1))
+                    for i, dist in enumerate(distances)]
 
-        logger.info(f"識別掃描結構: {len([s for s in segments if s[0]=='scan'])}條掃描線,閾值={threshold:.2f}m")
+        if logger.isEnabledFor(logging.INFO):
+            logger.info("識別掃描結構: %d條掃描線,閾值=%.2fm",
+                        sum(1 for s in segments if s[0] == 'scan'), threshold)
         return segments
 
     def _segment_scan_line(self, p1: Tuple[float, float], p2: Tuple[float, float],
@@ -360,18 +453,18 @@ class ObstacleManager:
         if not obstacles:
             return [p1, p2]
 
-        # 處理第一個障礙物
+        # 處理第一個障礙物，其餘的留待後續（切片即可，不必逐一比較）
         obstacle = obstacles[0]
+        remaining = obstacles[1:]
 
         # 獲取安全邊界(障礙區域 + 安全距離)
-        safe_boundary = obstacle.get_expanded_corners(obstacle.safe_distance)
+        safe_boundary = obstacle.get_safe_boundary(obstacle.safe_distance)
 
         # 檢測線段與障礙區域的交點
         intersections = self._line_polygon_intersections(p1, p2, safe_boundary)
 
         if len(intersections) < 2:
             # 沒有足夠的交點,嘗試其他障礙物
-            remaining = [o for o in obstacles if o != obstacle]
             if remaining:
                 return self._segment_scan_line(p1, p2, remaining, boundary_corners)
             return [p1, p2]
@@ -380,8 +473,7 @@ class ObstacleManager:
         detour_points = self._generate_boundary_detour(p1, p2, safe_boundary, intersections)
 
         if not detour_points:
-            logger.warning(f"繞行點生成失敗")
-            remaining = [o for o in obstacles if o != obstacle]
+            logger.warning("繞行點生成失敗")
             if remaining:
                 return self._segment_scan_line(p1, p2, remaining, boundary_corners)
             return [p1, p2]
@@ -393,16 +485,15 @@ class ObstacleManager:
                 valid_detour.append(dp)
 
         if not valid_detour:
-            logger.warning(f"繞行點超出邊界")
+            logger.warning("繞行點超出邊界")
             return [p1, p2]
 
         # 構建當前障礙物的繞行路徑
         current_path = [p1] + valid_detour + [p2]
 
         # 檢查是否還有其他障礙物需要處理
-        remaining = [o for o in obstacles if o != obstacle]
         if not remaining:
-            logger.info(f"成功生成繞行路徑: {len(valid_detour)}個繞行點")
+            logger.info("成功生成繞行路徑: %d個繞行點", len(valid_detour))
             return current_path
 
         # 遞歸處理剩餘障礙物
@@ -422,7 +513,7 @@ class ObstacleManager:
                 # 無碰撞,直接添加終點
                 final_path.append(seg_end)
 
-        logger.info(f"完整繞行路徑: 處理{len(obstacles)}個障礙物,生成{len(final_path)}個航點")
+        logger.info("完整繞行路徑: 處理%d個障礙物,生成%d個航點", len(obstacles), len(final_path))
         return final_path
 
     def _line_polygon_intersections(self, p1: Tuple[float, float], p2: Tuple[float, float],
@@ -433,16 +524,36 @@ class ObstacleManager:
         返回: 交點列表
         """
         intersections = []
-        n = len(polygon)
-
-        for i in range(n):
-            edge_start = polygon[i]
-            edge_end = polygon[(i + 1) % n]
+        if not polygon:
+            return intersections
 
-            # 檢測線段與多邊形邊的交點
-            intersection = self._line_segment_intersection(p1, p2, edge_start, edge_end)
-            if intersection:
-                intersections.append(intersection)
+        # 線段端點相關項對所有邊相同，迴圈外只算一次；
+        # 逐邊計算與 _line_segment_intersection 相同的式子，結果一致
+        x1, y1 = p1
+        x2, y2 = p2
+        dx12 = x1 - x2
+        dy12 = y1 - y2
+        dx21 = x2 - x1
+        dy21 = y2 - y1
+
+        # 與原本相同的邊順序：polygon[0]->polygon[1] ... polygon[-1]->polygon[0]
+        x3, y3 = polygon[0]
+        for x4, y4 in chain(islice(polygon, 1, None), polygon[:1]):
+            ex = x3 - x4
+            ey = y3 - y4
+            denom = dx12 * ey - dy12 * ex
+
+            # 平行或重合的邊略過
+            if abs(denom) >= 1e-10:
+                ax = x1 - x3
+                ay = y1 - y3
+                t = (ax * ey - ay * ex) / denom
+                if 0 <= t <= 1:
+                    u = -(dx12 * ay - dy12 * ax) / denom
+                    if 0 <= u <= 1:
+                        intersections.append((x1 + t * dx21, y1 + t * dy21))
+
+            x3, y3 = x4, y4
 
         return intersections
 
@@ -504,40 +615,30 @@ class ObstacleManager:
         mid_lon = (p1[1] + p2[1]) / 2
         scan_mid = (mid_lat, mid_lon)
 
-        # 生成兩個可能的繞行路徑
+        # 兩個可能的繞行路徑:
+        # [進入點, 沿邊界由entry_vertex走到exit_vertex的頂點..., 離開點]
+        # 先以索引算術取得各自的中點比較，只建立選中的那一條
         n = len(boundary)
+        cw_steps = (exit_vertex - entry_vertex) % n  # 路徑1: 順時針
+        ccw_steps = (entry_vertex - exit_vertex) % n  # 路徑2: 逆時針
 
-        # 路徑1: 順時針
-        path1 = [entry]
-        idx = entry_vertex
-        while idx != exit_vertex:
-            path1.append(boundary[idx])
-            idx = (idx + 1) % n
-        path1.append(boundary[exit_vertex])
-        path1.append(exit)
-
-        # 路徑2: 逆時針
-        path2 = [entry]
-        idx = entry_vertex
-        while idx != exit_vertex:
-            path2.append(boundary[idx])
-            idx = (idx - 1) % n
-        path2.append(boundary[exit_vertex])
-        path2.append(exit)
-
-        # 選擇遠離掃描線中點的路徑
-        # 計算兩條路徑的中點到掃描線中點的距離
-        path1_mid = path1[len(path1) // 2]
-        path2_mid = path2[len(path2) // 2]
+        # 路徑長度為steps+3，中點len//2必落在邊界頂點上
+        path1_mid = boundary[(entry_vertex + (cw_steps + 3) // 2 - 1) % n]
+        path2_mid = boundary[(entry_vertex - (ccw_steps + 3) // 2 + 1) % n]
 
+        # 選擇遠離掃描線中點的路徑(更安全的繞行)
         dist1 = self.calculate_distance(path1_mid, scan_mid)
         dist2 = self.calculate_distance(path2_mid, scan_mid)
 
-        # 選擇距離較遠的路徑(更安全的繞行)
         if dist1 > dist2:
-            return path1
+            step, steps = 1, cw_steps
         else:
-            return path2
+            step, steps = -1, ccw_steps
+
+        path = [entry]
+        path.extend(boundary[(entry_vertex + step * k) % n] for k in range(steps + 1))
+        path.append(exit)
+        return path
 
     def _find_nearest_vertex(self, point: Tuple[float, float],
                             polygon: List[Tuple[float, float]]) -> Optional[int]:
@@ -546,16 +647,11 @@ class ObstacleManager:
 
         返回: 頂點的索引
         """
-        min_dist = float('inf')
-        nearest_vertex = None
-
-        for i, vertex in enumerate(polygon):
-            dist = self.calculate_distance(point, vertex)
-            if dist < min_dist:
-                min_dist = dist
-                nearest_vertex = i
+        if not polygon:
+            return None
 
-        return nearest_vertex
+        distances = self.calculate_distances(point, polygon)
+        return min(range(len(distances)), key=distances.__getitem__)
 
     def _find_nearest_edge(self, point: Tuple[float, float],
                           polygon: List[Tuple[float, float]]) -> Optional[int]:
@@ -602,37 +698,58 @@ class ObstacleManager:
 
     def point_in_polygon(self, point: Tuple[float, float],
                         polygon: List[Tuple[float, float]]) -> bool:
-        """射線法判斷點是否在多邊形內"""
+        """
+        射線法判斷點是否在多邊形內
+
+        min()/max() 呼叫改為直接比較：只有經度跨越射線的邊
+        (min_lon < lon <= max_lon，此時兩端經度必不相等) 才需計算交點，
+        其餘邊只做兩次比較就略過。
+        """
         lat, lon = point
-        n = len(polygon)
         inside = False
 
-        p1_lat, p1_lon = polygon[0]
-        for i in range(1, n + 1):
-            p2_lat, p2_lon = polygon[i % n]
-            if lon > min(p1_lon, p2_lon):
-                if lon <= max(p1_lon, p2_lon):
-                    if lat <= max(p1_lat, p2_lat):
-                        if p1_lon != p2_lon:
-                            xinters = (lon - p1_lon) * (p2_lat - p1_lat) / (p2_lon - p1_lon) + p1_lat
-                        if p1_lat == p2_lat or lat <= xinters:
-                            inside = not inside
+        # 邊的方向與原本相同：polygon[i] -> polygon[i+1]，最後一條邊為 polygon[-1] -> polygon[0]
+        p1_lat, p1_lon = polygon[-1]
+        for p2_lat, p2_lon in polygon:
+            if (p1_lon < lon <= p2_lon) or (p2_lon < lon <= p1_lon):
+                if lat <= p1_lat or lat <= p2_lat:
+                    if p1_lat == p2_lat or lat <= (lon - p1_lon) * (p2_lat - p1_lat) / (p2_lon - p1_lon) + p1_lat:
+                        inside = not inside
             p1_lat, p1_lon = p2_lat, p2_lon
 
         return inside
 
     def check_waypoint_collision(self, waypoint: Tuple[float, float]) -> bool:
         """檢查航點是否在任何障礙區域內"""
+        return self.points_in_any_obstacle([waypoint])[0]
+
+    def points_in_any_obstacle(self, points: List[Tuple[float, float]]) -> List[bool]:
+        """
+        批次檢查多個點是否落在任何障礙物的安全邊界內
+
+        每個障礙物的安全邊界與外接矩形只準備一次，
+        點在外接矩形外時不必進行射線法判斷。
+
+        返回: 與points同長度的布林列表
+        """
+        boundaries = []
         for obstacle in self.obstacles:
             if not obstacle.is_complete or len(obstacle.corners) < 3:
                 continue
 
-            # 檢查是否在安全邊界內
-            safe_boundary = obstacle.get_expanded_corners(obstacle.safe_distance)
-            if self.point_in_polygon(waypoint, safe_boundary):
-                return True
+            safe_boundary = obstacle.get_safe_boundary(obstacle.safe_distance)
+            boundaries.append(obstacle.get_expanded_bounds(obstacle.safe_distance) + (safe_boundary,))
 
-        return False
+        point_in_polygon = self.point_in_polygon
+        results = []
+        for point in points:
+            lat, lon = point
+            results.append(any(
+                min_lat <= lat <= max_lat and min_lon <= lon <= max_lon
+                and point_in_polygon(point, boundary)
+                for min_lat, max_lat, min_lon, max_lon, boundary in boundaries))
+
+        return results
 
     def check_segment_collision(self, p1: Tuple[float, float],
                                p2: Tuple[float, float],
@@ -644,12 +761,26 @@ class ObstacleManager:
         obstacles = obstacles_to_check if obstacles_to_check is not None else self.obstacles
         colliding_obstacles = []
 
+        # 線段外接矩形與各邊共用的線段項
+        x1, y1 = p1
+        x2, y2 = p2
+        seg_min_lat, seg_max_lat = min(x1, x2), max(x1, x2)
+        seg_min_lon, seg_max_lon = min(y1, y2), max(y1, y2)
+        dx12 = x1 - x2
+        dy12 = y1 - y2
+
         for obstacle in obstacles:
             if not obstacle.is_complete or len(obstacle.corners) < 3:
                 continue
 
+            # 外接矩形不重疊時不可能相交，跳過射線法與逐邊檢查
+            min_lat, max_lat, min_lon, max_lon = obstacle.get_expanded_bounds(obstacle.safe_distance)
+            if (seg_max_lat < min_lat or seg_min_lat > max_lat
+                    or seg_max_lon < min_lon or seg_min_lon > max_lon):
+                continue
+
             # 檢查線段是否與安全邊界相交
-            safe_boundary = obstacle.get_expanded_corners(obstacle.safe_distance)
+            safe_boundary = obstacle.get_safe_boundary(obstacle.safe_distance)
 
             # 檢查線段端點是否在多邊形內
             if self.point_in_polygon(p1, safe_boundary) or self.point_in_polygon(p2, safe_boundary):
@@ -657,14 +788,26 @@ class ObstacleManager:
                 continue
 
             # 檢查線段是否與多邊形邊相交
-            n = len(safe_boundary)
-            for i in range(n):
-                edge_start = safe_boundary[i]
-                edge_end = safe_boundary[(i + 1) % n]
-
-                if self._line_segment_intersection(p1, p2, edge_start, edge_end):
-                    colliding_obstacles.append(obstacle)
-                    break
+            # 逐邊內聯與 _line_segment_intersection 相同的判斷式，只需知道是否相交
+            x3, y3 = safe_boundary[0]
+            for x4, y4 in chain(islice(safe_boundary, 1, None), safe_boundary[:1]):
+                # 邊的外接矩形與線段外接矩形不重疊時跳過
+                if not ((x3 < seg_min_lat and x4 < seg_min_lat)
+                        or (x3 > seg_max_lat and x4 > seg_max_lat)
+                        or (y3 < seg_min_lon and y4 < seg_min_lon)
+                        or (y3 > seg_max_lon and y4 > seg_max_lon)):
+                    ex = x3 - x4
+                    ey = y3 - y4
+                    denom = dx12 * ey - dy12 * ex
+                    if abs(denom) >= 1e-10:
+                        ax = x1 - x3
+                        ay = y1 - y3
+                        if (0 <= (ax * ey - ay * ex) / denom <= 1
+                                and 0 <= -(dx12 * ay - dy12 * ax) / denom <= 1):
+                            colliding_obstacles.append(obstacle)
+                            break
+
+                x3, y3 = x4, y4
 
         return colliding_obstacles
 
@@ -674,18 +817,55 @@ class ObstacleManager:
         lat1, lon1 = p1
         lat2, lon2 = p2
 
-        # 使用平均緯度計算經度縮放
-        avg_lat = (lat1 + lat2) / 2
-        cos_lat = math.cos(math.radians(avg_lat))
+        # 經度縮放：有參考緯度時共用，否則使用平均緯度
+        m_per_lon = self._m_per_lon
+        if m_per_lon is None:
+            avg_lat = (lat1 + lat2) / 2
+            m_per_lon = _EARTH_RADIUS_M * math.cos(math.radians(avg_lat))
 
-        # 緯度和經度差值(度)
-        dlat = lat2 - lat1
-        dlon = lon2 - lon1
+        # 轉換為公尺並計算距離
+        return math.hypot((lat2 - lat1) * _EARTH_RADIUS_M,
+                          (lon2 - lon1) * m_per_lon)
 
-        # 轉換為公尺
-        dy = dlat * self.earth_radius_m
-        dx = dlon * self.earth_radius_m * cos_lat
+    def calculate_distances(self, point: Tuple[float, float],
+                            points: List[Tuple[float, float]]) -> List[float]:
+        """
+        批次計算一點到多個點的距離(公尺) - 平面近似
 
-        # 計算距離
-        distance = math.sqrt(dx*dx + dy*dy)
-        return distance
+        與calculate_distance結果相同，但在單一推導式內完成，
+        省去每個點一次的方法呼叫與tuple拆解。
+        """
+        lat1, lon1 = point
+        r = _EARTH_RADIUS_M
+        hypot = math.hypot
+        m_per_lon = self._m_per_lon
+        if m_per_lon is not None:
+            return [hypot((lat2 - lat1) * r, (lon2 - lon1) * m_per_lon)
+                    for lat2, lon2 in points]
+
+        cos, radians = math.cos, math.radians
+        return [hypot((lat2 - lat1) * r,
+                      (lon2 - lon1) * (r * cos(radians((lat1 + lat2) / 2))))
+                for lat2, lon2 in points]
+
+    def calculate_path_distances(self, points: List[Tuple[float, float]],
+                                 m_per_lon: Optional[float] = None) -> List[float]:
+        """
+        批次計算路徑上相鄰兩點的距離(公尺) - 平面近似
+
+        返回長度為len(points)-1的列表，第i項等於calculate_distance(points[i], points[i+1])
+        m_per_lon: 指定每度經度公尺數時整批共用，不再逐段計算三角函數
+        """
+        r = _EARTH_RADIUS_M
+        hypot = math.hypot
+        if m_per_lon is None:
+            m_per_lon = self._m_per_lon
+        pairs = zip(points, islice(points, 1, None))
+        if m_per_lon is not None:
+            return [hypot((lat2 - lat1) * r, (lon2 - lon1) * m_per_lon)
+                    for (lat1, lon1), (lat2, lon2) in pairs]
+
+        cos, radians = math.cos, math.radians
+        return [hypot((lat2 - lat1) * r,
+                      (lon2 - lon1) * (r * cos(radians((lat1 + lat2) / 2))))
+                for (lat1, lon1), (lat2, lon2) in pairs]
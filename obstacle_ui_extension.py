@@ -3,12 +3,24 @@
 與主邊界打點方式一致，精確圍出障礙區域
 """
 
+import contextlib
+import weakref
 import tkinter as tk
 from tkinter import ttk
 from typing import Optional, Tuple, List
 from obstacle_manager import ObstacleManager, Obstacle
 from logger_utils import logger
 
+# 障礙物顯示樣式（模組層級共用，不必每次呼叫重新組合參數）
+_MARKER_STYLE = dict(marker_color_circle="#8B5CF6",  # 紫色
+                     marker_color_outside="#8B5CF6")
+_SAFE_STYLE = dict(fill_color="#E6D8F5",  # 非常淺的紫色
+                   outline_color="#9370DB",  # 中紫色
+                   border_width=2)
+_OBST_STYLE = dict(fill_color="#B39DDB",  # 中度紫色
+                   outline_color="#7B1FA2",  # 深紫色
+                   border_width=3)
+
 
 class ObstacleUIExtension:
     """障礙物UI擴展 - 多邊形角點打點版"""
@@ -27,6 +39,14 @@ class ObstacleUIExtension:
         # 保存原始地圖點擊處理器
         self.original_map_click_handler = None
 
+        # 延遲重繪排程（拖動滑桿時合併成一次重繪）
+        self._redraw_after_id = None
+        # 障礙物 -> 目前地圖上安全邊界所用的安全距離，用於判斷哪些需要重繪
+        self._drawn_safe_distance = weakref.WeakKeyDictionary()
+        # 待建立的角點標記 (障礙物, 緯度, 經度, 編號)，閒置時批次建立
+        self._pending_markers = []
+        self._marker_flush_id = None
+
     def add_obstacle_ui(self, parent_frame):
         """添加障礙物管理UI - 簡化版"""
         obstacle_frame = ttk.LabelFrame(parent_frame, text="障礙物管理",
@@ -118,11 +138,8 @@ class ObstacleUIExtension:
         if self.obstacle_manager.current_creating_obstacle:
             current = self.obstacle_manager.current_creating_obstacle
             # 刪除已打的標記
-            for marker in current.markers:
-                try:
-                    marker.delete()
-                except:
-                    pass
+            self._discard_pending_markers()
+            self._delete_map_objects(current.markers)
             current.markers.clear()
 
             self.obstacle_manager.cancel_current_obstacle()
@@ -149,15 +166,11 @@ class ObstacleUIExtension:
         # 添加角點
         current.add_corner(lat, lon)
 
-        # 創建標記
+        # 標記延至閒置時批次建立，連續點擊時回應不隨已打點數變慢
         point_num = len(current.corners)
-        marker = self.app.map.set_marker(
-            lat, lon,
-            text=f"O{point_num}",
-            marker_color_circle="#8B5CF6",  # 紫色
-            marker_color_outside="#8B5CF6"
-        )
-        current.markers.append(marker)
+        self._pending_markers.append((current, lat, lon, point_num))
+        if self._marker_flush_id is None:
+            self._marker_flush_id = self.app.after_idle(self._flush_pending_markers)
 
         # 更新狀態
         if point_num < 3:
@@ -165,7 +178,34 @@ class ObstacleUIExtension:
         else:
             self.update_status(f"已標記 {point_num} 點 - 可以完成障礙物")
 
-        logger.info(f"添加障礙角點 O{point_num}: ({lat:.6f}, {lon:.6f})")
+        logger.info("添加障礙角點 O%d: (%.6f, %.6f)", point_num, lat, lon)
+
+    def _flush_pending_markers(self):
+        """批次建立待建立的角點標記（圖層只重排一次）"""
+        self._marker_flush_id = None
+        pending, self._pending_markers = self._pending_markers, []
+        if not pending:
+            return
+
+        # 仍使用地圖的標記物件：平移、縮放時由地圖負責重新定位，自行建立的畫布項目不會跟著移動；
+        # 逐一建立的主要成本（每個標記重排圖層）已由批次區塊省去
+        set_marker = self.app.map.set_marker
+        batch = getattr(self.app, '_map_batch', None)
+        with batch() if batch else contextlib.nullcontext():
+            for obstacle, lat, lon, point_num in pending:
+                marker = set_marker(
+                    lat, lon,
+                    text=f"O{point_num}",
+                    **_MARKER_STYLE
+                )
+                obstacle.markers.append(marker)
+
+    def _discard_pending_markers(self):
+        """捨棄尚未建立的角點標記（障礙物完成或取消後臨時標記不再需要）"""
+        if self._marker_flush_id is not None:
+            self.app.after_cancel(self._marker_flush_id)
+            self._marker_flush_id = None
+        self._pending_markers.clear()
 
     def remove_last_corner(self):
         """刪除最後一個角點"""
@@ -176,16 +216,14 @@ class ObstacleUIExtension:
         if not current.corners:
             return
 
-        # 刪除最後的標記
-        if current.markers:
-            last_marker = current.markers.pop()
-            try:
-                last_marker.delete()
-            except:
-                pass
+        # 刪除最後的標記（尚未建立時直接從待建立佇列移除）
+        if self._pending_markers:
+            self._pending_markers.pop()
+        elif current.markers:
+            self._delete_map_objects([current.markers.pop()])
 
         # 刪除最後的角點
-        current.corners.pop()
+        current.remove_last_corner()
 
         # 更新狀態
         point_num = len(current.corners)
@@ -194,7 +232,7 @@ class ObstacleUIExtension:
         else:
             self.update_status(f"已標記 {point_num} 點 - 可以完成障礙物")
 
-        logger.info(f"刪除障礙角點，剩餘 {point_num} 點")
+        logger.info("刪除障礙角點，剩餘 %d 點", point_num)
 
     def finish_current_obstacle(self):
         """完成當前障礙物"""
@@ -212,11 +250,8 @@ class ObstacleUIExtension:
 
         if success:
             # 清除臨時標記
-            for marker in current.markers:
-                try:
-                    marker.delete()
-                except:
-                    pass
+            self._discard_pending_markers()
+            self._delete_map_objects(current.markers)
             current.markers.clear()
 
             # 創建障礙物顯示
@@ -230,7 +265,7 @@ class ObstacleUIExtension:
             self.obstacle_manager.start_new_obstacle(self.default_safe_distance)
             self.update_status("可以繼續標記下一個障礙物")
 
-            logger.info(f"完成障礙物創建: {len(current.corners)} 個角點")
+            logger.info("完成障礙物創建: %d 個角點", len(current.corners))
 
     def create_obstacle_display(self, obstacle: Obstacle):
         """創建障礙物顯示 - 多邊形版"""
@@ -239,41 +274,30 @@ class ObstacleUIExtension:
                 return
 
             # 計算中心點
-            center_lat = sum(c[0] for c in obstacle.corners) / len(obstacle.corners)
-            center_lon = sum(c[1] for c in obstacle.corners) / len(obstacle.corners)
+            center_lat, center_lon = obstacle.get_center()
 
             # 中心標記
             center_marker = self.app.map.set_marker(
                 center_lat, center_lon,
                 text=f"🚫\n{len(obstacle.corners)}點",
-                marker_color_circle="#8B5CF6",
-                marker_color_outside="#8B5CF6"
+                **_MARKER_STYLE
             )
             obstacle.markers.append(center_marker)
 
             # 安全邊界多邊形 (淺紫色外圈)
             safe_boundary = obstacle.get_expanded_corners(obstacle.safe_distance)
-            obstacle.safe_polygon = self.app.map.set_polygon(
-                safe_boundary,
-                fill_color="#E6D8F5",  # 非常淺的紫色
-                outline_color="#9370DB",  # 中紫色
-                border_width=2
-            )
+            obstacle.safe_polygon = self.app.map.set_polygon(safe_boundary, **_SAFE_STYLE)
 
             # 障礙物多邊形 (深紫色內圈)
-            obstacle.polygon = self.app.map.set_polygon(
-                obstacle.corners,
-                fill_color="#B39DDB",  # 中度紫色
-                outline_color="#7B1FA2",  # 深紫色
-                border_width=3
-            )
+            obstacle.polygon = self.app.map.set_polygon(obstacle.corners, **_OBST_STYLE)
 
             # 加入paths以支持地圖操作
             self.app.paths.append(obstacle.safe_polygon)
             self.app.paths.append(obstacle.polygon)
+            self._drawn_safe_distance[obstacle] = obstacle.safe_distance
 
         except Exception as e:
-            logger.error(f"創建障礙物顯示失敗: {e}")
+            logger.error("創建障礙物顯示失敗: %s", e)
 
     def on_safe_distance_change(self, value):
         """安全距離改變"""
@@ -283,50 +307,68 @@ class ObstacleUIExtension:
         if self.obstacle_manager.current_creating_obstacle:
             self.obstacle_manager.current_creating_obstacle.safe_distance = value
 
-        # 重新繪製所有已完成的障礙物
-        self.redraw_all_obstacles()
-
-    def redraw_all_obstacles(self):
-        """重新繪製所有障礙物"""
-        for obstacle in self.obstacle_manager.obstacles:
-            if not obstacle.is_complete:
-                continue
-
-            # 刪除舊顯示
-            if obstacle.polygon:
-                if obstacle.polygon in self.app.paths:
-                    self.app.paths.remove(obstacle.polygon)
-                try:
-                    obstacle.polygon.delete()
-                except:
-                    pass
-
-            if obstacle.safe_polygon:
-                if obstacle.safe_polygon in self.app.paths:
-                    self.app.paths.remove(obstacle.safe_polygon)
-                try:
-                    obstacle.safe_polygon.delete()
-                except:
-                    pass
-
-            # 重新創建 (不需要重新創建中心標記)
-            safe_boundary = obstacle.get_expanded_corners(obstacle.safe_distance)
-            obstacle.safe_polygon = self.app.map.set_polygon(
-                safe_boundary,
-                fill_color="#E6D8F5",
-                outline_color="#9370DB",
-                border_width=2
-            )
-
-            obstacle.polygon = self.app.map.set_polygon(
-                obstacle.corners,
-                fill_color="#B39DDB",
-                outline_color="#7B1FA2",
-                border_width=3
-            )
-
-            self.app.paths.append(obstacle.safe_polygon)
-            self.app.paths.append(obstacle.polygon)
+        # 滑桿只改變預設值與創建中的障礙物（尚無多邊形），已完成障礙物的安全距離不變；
+        # 只有顯示與安全距離不一致的障礙物才需要重繪（拖動期間合併為一次）
+        if self._stale_obstacles():
+            self.schedule_redraw()
+
+    def _stale_obstacles(self) -> List[Obstacle]:
+        """已完成、但地圖上的安全邊界與目前安全距離不一致的障礙物"""
+        drawn = self._drawn_safe_distance
+        return [obs for obs in self.obstacle_manager.obstacles
+                if obs.is_complete and drawn.get(obs) != obs.safe_distance]
+
+    def schedule_redraw(self, delay_ms: int = 30):
+        """排程重繪障礙物，短時間內的多次呼叫只執行最後一次"""
+        if self._redraw_after_id is not None:
+            self.app.after_cancel(self._redraw_after_id)
+        self._redraw_after_id = self.app.after(delay_ms, self._run_scheduled_redraw)
+
+    def _run_scheduled_redraw(self):
+        """執行排程的重繪"""
+        self._redraw_after_id = None
+        self.redraw_all_obstacles(self._stale_obstacles())
+
+    def redraw_all_obstacles(self, obstacles: Optional[List[Obstacle]] = None):
+        """重新繪製障礙物（未指定時為所有已完成的障礙物）"""
+        if obstacles is None:
+            obstacles = self.obstacle_manager.obstacles
+        completed = [obs for obs in obstacles if obs.is_complete]
+
+        # 地圖物件批次更新：圖層只重排一次
+        batch = getattr(self.app, '_map_batch', None)
+        with batch() if batch else contextlib.nullcontext():
+            for obstacle in completed:
+                # 障礙物角點不變，只需更新安全邊界；多邊形仍存在時原地更新座標
+                safe_boundary = obstacle.get_expanded_corners(obstacle.safe_distance)
+                self._drawn_safe_distance[obstacle] = obstacle.safe_distance
+                if (not getattr(obstacle.polygon, 'deleted', True)
+                        and self._update_polygon(obstacle.safe_polygon, safe_boundary)):
+                    continue
+
+                # 多邊形已不存在時才刪除並重新創建 (不需要重新創建中心標記)
+                self._discard_from_paths([obstacle.polygon, obstacle.safe_polygon])
+                self._delete_map_objects(
+                    [poly for poly in (obstacle.polygon, obstacle.safe_polygon) if poly])
+
+                obstacle.safe_polygon = self.app.map.set_polygon(safe_boundary, **_SAFE_STYLE)
+                obstacle.polygon = self.app.map.set_polygon(obstacle.corners, **_OBST_STYLE)
+
+                self.app.paths.append(obstacle.safe_polygon)
+                self.app.paths.append(obstacle.polygon)
+
+    def _update_polygon(self, polygon, positions) -> bool:
+        """
+        原地更新地圖多邊形的座標並重繪（沿用同一個畫布物件）
+
+        返回: 是否已更新；多邊形不存在或已刪除時返回False，由呼叫端重新創建
+        """
+        if polygon is None or getattr(polygon, 'deleted', True):
+            return False
+
+        polygon.position_list = list(positions)
+        polygon.draw()
+        return True
 
     def toggle_delete_mode(self):
         """切換刪除模式"""
@@ -363,25 +405,15 @@ class ObstacleUIExtension:
 
         if removed:
             # 從paths移除
-            if removed.polygon and removed.polygon in self.app.paths:
-                self.app.paths.remove(removed.polygon)
-            if removed.safe_polygon and removed.safe_polygon in self.app.paths:
-                self.app.paths.remove(removed.safe_polygon)
+            self._discard_from_paths([removed.polygon, removed.safe_polygon])
 
             # 刪除顯示
-            try:
-                for marker in removed.markers:
-                    marker.delete()
-                if removed.polygon:
-                    removed.polygon.delete()
-                if removed.safe_polygon:
-                    removed.safe_polygon.delete()
-            except:
-                pass
+            self._delete_map_objects(
+                removed.markers + [poly for poly in (removed.polygon, removed.safe_polygon) if poly])
 
             self.update_info()
             self.update_status("已刪除障礙物")
-            logger.info(f"已刪除障礙物")
+            logger.info("已刪除障礙物")
         else:
             self.update_status("未找到附近的障礙物")
 
@@ -390,38 +422,51 @@ class ObstacleUIExtension:
 
     def clear_all_obstacles(self):
         """清除所有障礙物"""
-        for obstacle in self.obstacle_manager.obstacles[:]:
-            # 從paths移除
-            if obstacle.polygon and obstacle.polygon in self.app.paths:
-                self.app.paths.remove(obstacle.polygon)
-            if obstacle.safe_polygon and obstacle.safe_polygon in self.app.paths:
-                self.app.paths.remove(obstacle.safe_polygon)
+        # 從paths移除
+        self._discard_from_paths(
+            [poly for obs in self.obstacle_manager.obstacles for poly in (obs.polygon, obs.safe_polygon)])
 
-            # 刪除顯示
-            try:
-                for marker in obstacle.markers:
-                    marker.delete()
-                if obstacle.polygon:
-                    obstacle.polygon.delete()
-                if obstacle.safe_polygon:
-                    obstacle.safe_polygon.delete()
-            except:
-                pass
-
-        # 清除當前創建中的障礙物
+        # 刪除顯示（含當前創建中障礙物的標記），所有畫布項目一次刪除
+        objects = []
+        for obstacle in self.obstacle_manager.obstacles:
+            objects.extend(obstacle.markers)
+            objects.extend(poly for poly in (obstacle.polygon, obstacle.safe_polygon) if poly)
         if self.obstacle_manager.current_creating_obstacle:
-            current = self.obstacle_manager.current_creating_obstacle
-            for marker in current.markers:
-                try:
-                    marker.delete()
-                except:
-                    pass
+            objects.extend(self.obstacle_manager.current_creating_obstacle.markers)
+        self._discard_pending_markers()
+        self._delete_map_objects(objects)
 
         self.obstacle_manager.clear_all()
         self.update_info()
         self.update_status("")
         logger.info("已清除所有障礙物")
 
+    def _delete_map_objects(self, objects):
+        """
+        批次刪除地圖物件（標記、多邊形）
+        主程式提供批次刪除時以單次畫布呼叫完成，否則逐一刪除；
+        已刪除的物件以 deleted 旗標略過，整批只用一個try，失敗時記錄而不中斷操作
+        """
+        try:
+            bulk_delete = getattr(self.app, '_delete_map_objects', None)
+            if bulk_delete:
+                bulk_delete(objects)
+            else:
+                for obj in objects:
+                    if not getattr(obj, 'deleted', False):
+                        obj.delete()
+        except Exception as e:
+            logger.debug("刪除地圖物件失敗: %s", e)
+
+    def _discard_from_paths(self, objects):
+        """
+        從app.paths移除指定的地圖物件
+        以id集合判斷、單次重建列表，避免每個物件各做一次in與remove的線性搜尋
+        """
+        ids = {id(obj) for obj in objects if obj}
+        if ids:
+            self.app.paths[:] = [p for p in self.app.paths if id(p) not in ids]
+
     def update_info(self):
         """更新資訊"""
         count = len(self.obstacle_manager.obstacles)
@@ -436,5 +481,5 @@ class ObstacleUIExtension:
         if not self.obstacle_manager.obstacles:
             return waypoints
 
-        logger.info(f"應用障礙物繞行: {len(self.obstacle_manager.obstacles)} 個")
+        logger.info("應用障礙物繞行: %d 個", len(self.obstacle_manager.obstacles))
         return self.obstacle_manager.filter_waypoints_with_detour(waypoints, boundary_corners)
@@ -4,9 +4,23 @@
 """
 
 import math
+import functools
 from typing import List, Tuple
 
 
+def _pseudo_angle(dx: float, dy: float) -> float:
+    """
+    與 math.atan2(dy, dx) 同序的偽角度，範圍 (-2, 2]
+    只用加減除與比較，作為排序鍵時不必計算三角函數
+    """
+    denom = abs(dx) + abs(dy)
+    if denom == 0:
+        return 0.0
+    if dy < 0:
+        return dx / denom - 1
+    return 1 - dx / denom
+
+
 # ==============================
 # 區域分割器（新增間隔功能）
 # ==============================
@@ -27,39 +41,39 @@ class RegionDivider:
         return (x, y)
     
     @staticmethod
-    def subdivide_rectangle(corners: List[Tuple[float, float]], n: int, spacing_m: float = 0.0) -> List[List[Tuple[float, float]]]:
-        """分割四邊形區域，支持間隔設定"""
+    def bilinear_interpolation_batch(corners: List[Tuple[float, float]],
+                                     uv_points: List[Tuple[float, float]]) -> List[Tuple[float, float]]:
+        """
+        雙線性插值（批次版）
+        一次計算多個 (u, v) 的插值點，結果與逐點呼叫 bilinear_interpolation 相同
+        """
         if len(corners) != 4:
-            raise ValueError("矩形分割需要4個角點")
-        
-        if n == 1:
-            return [corners]
+            raise ValueError("雙線性插值需要4個角點")
         
-        regions = []
+        (x0, y0), (x1, y1), (x2, y2), (x3, y3) = corners  # 左下、右下、右上、左上
         
-        # 如果有間隔，計算間隔比例
-        spacing_ratio = 0.0
-        if spacing_m > 0:
-            # 計算區域的平均寬度來決定間隔比例
-            width1 = RegionDivider._calculate_distance(corners[0], corners[1])
-            width2 = RegionDivider._calculate_distance(corners[3], corners[2])
-            avg_width = (width1 + width2) / 2
-            spacing_ratio = min(0.1, spacing_m / avg_width)  # 限制最大間隔比例為10%
+        return [((1-u)*(1-v)*x0 + u*(1-v)*x1 + u*v*x2 + (1-u)*v*x3,
+                 (1-u)*(1-v)*y0 + u*(1-v)*y1 + u*v*y2 + (1-u)*v*y3)
+                for u, v in uv_points]
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _rectangle_cells(n: int, spacing_ratio: float) -> Tuple[Tuple[float, float, float, float], ...]:
+        """
+        計算n等分的子區域在單位正方形中的範圍 (u0, u1, v0, v1)
+        分割版型只取決於n與間隔比例，與角點座標無關，可以快取重用
+        """
+        cells = []
         
         if n in (2, 3):
-            # 水平分割
+            # 水平分割，考慮間隔
+            total_spacing = spacing_ratio * (n - 1)
+            effective_width = 1.0 - total_spacing
+            segment_width = effective_width / n
+            
             for i in range(n):
-                # 計算分割位置，考慮間隔
-                if n > 1:
-                    total_spacing = spacing_ratio * (n - 1)
-                    effective_width = 1.0 - total_spacing
-                    segment_width = effective_width / n
-                    
-                    u0 = i * (segment_width + spacing_ratio)
-                    u1 = u0 + segment_width
-                else:
-                    u0 = 0
-                    u1 = 1
+                u0 = i * (segment_width + spacing_ratio)
+                u1 = u0 + segment_width
                 
                 # 確保邊界值在有效範圍內
                 u0 = max(0, min(1, u0))
@@ -68,12 +82,7 @@ class RegionDivider:
                 if u0 >= u1:
                     continue
                 
-                bl = RegionDivider.bilinear_interpolation(corners, u0, 0)
-                br = RegionDivider.bilinear_interpolation(corners, u1, 0)
-                tr = RegionDivider.bilinear_interpolation(corners, u1, 1)
-                tl = RegionDivider.bilinear_interpolation(corners, u0, 1)
-                
-                regions.append([bl, br, tr, tl])
+                cells.append((u0, u1, 0, 1))
         
         elif n == 4:
             # 2x2網格分割
@@ -95,14 +104,44 @@ class RegionDivider:
                     if u0 >= u1 or v0 >= v1:
                         continue
                     
-                    bl = RegionDivider.bilinear_interpolation(corners, u0, v0)
-                    br = RegionDivider.bilinear_interpolation(corners, u1, v0)
-                    tr = RegionDivider.bilinear_interpolation(corners, u1, v1)
-                    tl = RegionDivider.bilinear_interpolation(corners, u0, v1)
-                    
-                    regions.append([bl, br, tr, tl])
+                    cells.append((u0, u1, v0, v1))
         
-        return regions
+        return tuple(cells)
+    
+    @staticmethod
+    @functools.lru_cache(maxsize=64)
+    def _rectangle_uv_table(n: int, spacing_ratio: float) -> Tuple[Tuple[float, float], ...]:
+        """
+        各子區域四個角點的 (u, v) 表，依序為左下、右下、右上、左上，攤平成單一序列
+        與角點座標無關，快取後每次分割只需查表再批次插值
+        """
+        uv_points = []
+        for u0, u1, v0, v1 in RegionDivider._rectangle_cells(n, spacing_ratio):
+            uv_points += ((u0, v0), (u1, v0), (u1, v1), (u0, v1))
+        return tuple(uv_points)
+    
+    @staticmethod
+    def subdivide_rectangle(corners: List[Tuple[float, float]], n: int, spacing_m: float = 0.0) -> List[List[Tuple[float, float]]]:
+        """分割四邊形區域，支持間隔設定"""
+        if len(corners) != 4:
+            raise ValueError("矩形分割需要4個角點")
+        
+        if n == 1:
+            return [corners]
+        
+        # 如果有間隔，計算間隔比例
+        spacing_ratio = 0.0
+        if spacing_m > 0:
+            # 計算區域的平均寬度來決定間隔比例
+            width1 = RegionDivider._calculate_distance(corners[0], corners[1])
+            width2 = RegionDivider._calculate_distance(corners[3], corners[2])
+            avg_width = (width1 + width2) / 2
+            spacing_ratio = min(0.1, spacing_m / avg_width)  # 限制最大間隔比例為10%
+        
+        # 所有子區域的角點一次批次插值（每個子區域依序為左下、右下、右上、左上）
+        uv_points = RegionDivider._rectangle_uv_table(n, spacing_ratio)
+        points = RegionDivider.bilinear_interpolation_batch(corners, uv_points)
+        return [points[i:i + 4] for i in range(0, len(points), 4)]
     
     @staticmethod
     def subdivide_polygon(corners: List[Tuple[float, float]], n: int, spacing_m: float = 0.0) -> List[List[Tuple[float, float]]]:
@@ -117,8 +156,10 @@ class RegionDivider:
         
         # 計算間隔
         if spacing_m > 0:
-            # 將間隔從公尺轉換為緯度（約111111公尺/度）
-            spacing_deg = spacing_m / 111111.0
+            # 條帶沿經度(p[1])切分：以平均緯度的經度縮放將間隔從公尺換算為度
+            # （仿射投影下直接在經緯度上裁切與在公尺座標上裁切結果相同，只需換算間隔）
+            mean_lat = sum(p[0] for p in corners) / len(corners)
+            spacing_deg = spacing_m / (111111.0 * math.cos(math.radians(mean_lat)))
             total_spacing = spacing_deg * (n - 1)
             
             # 如果間隔太大，調整到合理範圍
@@ -133,6 +174,10 @@ class RegionDivider:
         effective_height = total_height - total_spacing
         strip_height = effective_height / n
         
+        # 邊表只建立一次，各條帶共用：(起點x, 起點y, 緯度下界, 緯度上界, dx, dy, 是否可求交點)
+        edges = [(x1, y1, min(y1, y2), max(y1, y2), x2 - x1, y2 - y1, abs(y2 - y1) > 1e-10)
+                 for (x1, y1), (x2, y2) in zip(corners, corners[1:] + corners[:1])]
+        
         regions = []
         
         for i in range(n):
@@ -151,21 +196,15 @@ class RegionDivider:
             strip_points = []
             
             # 加入與條帶邊界相交的點
-            for j in range(len(corners)):
-                x1, y1 = corners[j]
-                x2, y2 = corners[(j + 1) % len(corners)]
-                
-                # 檢查與y_start的交點
-                if (y1 <= y_start <= y2) or (y2 <= y_start <= y1):
-                    if abs(y2 - y1) > 1e-10:
-                        x_intersect = x1 + (y_start - y1) * (x2 - x1) / (y2 - y1)
-                        strip_points.append((x_intersect, y_start))
-                
-                # 檢查與y_end的交點
-                if (y1 <= y_end <= y2) or (y2 <= y_end <= y1):
-                    if abs(y2 - y1) > 1e-10:
-                        x_intersect = x1 + (y_end - y1) * (x2 - x1) / (y2 - y1)
-                        strip_points.append((x_intersect, y_end))
+            for x1, y1, lo, hi, dx, dy, sloped in edges:
+                if sloped:
+                    # 檢查與y_start的交點
+                    if lo <= y_start <= hi:
+                        strip_points.append((x1 + (y_start - y1) * dx / dy, y_start))
+                    
+                    # 檢查與y_end的交點
+                    if lo <= y_end <= hi:
+                        strip_points.append((x1 + (y_end - y1) * dx / dy, y_end))
                 
                 # 加入在條帶內的原始頂點
                 if y_start <= y1 <= y_end:
@@ -174,10 +213,12 @@ class RegionDivider:
             # 去重並排序
             if len(strip_points) >= 3:
                 # 按角度排序形成多邊形
-                cx = sum(p[0] for p in strip_points) / len(strip_points)
-                cy = sum(p[1] for p in strip_points) / len(strip_points)
+                # 中心以拆開的座標欄位加總（同一順序，結果不變）
+                xs, ys = zip(*strip_points)
+                cx = sum(xs) / len(xs)
+                cy = sum(ys) / len(ys)
                 
-                strip_points.sort(key=lambda p: math.atan2(p[1] - cy, p[0] - cx))
+                strip_points.sort(key=lambda p: _pseudo_angle(p[0] - cx, p[1] - cy))
                 regions.append(strip_points)
             else:
                 regions.append(corners)  # 備用方案
@@ -186,7 +227,8 @@ class RegionDivider:
     
     @staticmethod
     def _calculate_distance(p1: Tuple[float, float], p2: Tuple[float, float]) -> float:
-        """計算兩點間距離（簡化版，用於估算）"""
+        """計算兩點間距離（等距柱狀投影近似，用於估算）"""
         dlat = p2[0] - p1[0]
-        dlon = p2[1] - p1[1]
-        return math.sqrt(dlat**2 + dlon**2) * 111111.0  # 轉換為公尺
\ No newline at end of file
+        # 經度差依平均緯度縮放，否則離赤道越遠東西向距離高估越多
+        dlon = (p2[1] - p1[1]) * math.cos(math.radians((p1[0] + p2[0]) / 2))
+        return math.hypot(dlat, dlon) * 111111.0  # 轉換為公尺
\ No newline at end of file
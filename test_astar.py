@@ -3,8 +3,10 @@ A* Pathfinding Algorithm Test Script
 Test A* pathfinding functionality
 """
 
-from astar_pathfinding import GridMap, AStarPathfinder
+from astar_pathfinding import GridMap, AStarPathfinder, HierarchicalAStar
 from obstacle_manager import Obstacle, ObstacleManager
+from waypoint_generator import OptimizedWaypointGenerator
+from config import FlightParameters
 
 def test_astar_basic():
     """Basic A* pathfinding test"""
@@ -81,10 +83,47 @@ def test_astar_with_obstacle():
     print()
 
 
+def test_hierarchical_astar():
+    """Test hierarchical (cluster) A* against plain A*"""
+    print("=" * 50)
+    print("Test 3: Hierarchical A* on a larger map")
+    print("=" * 50)
+
+    # Create map large enough for several clusters
+    bounds = (24.0, 24.002, 120.0, 120.002)
+    grid_map = GridMap(bounds, resolution=0.5)
+
+    # Add a wall with a gap near the east side
+    wall = [
+        (24.0009, 120.0),
+        (24.0009, 120.0017),
+        (24.0011, 120.0017),
+        (24.0011, 120.0)
+    ]
+    grid_map.mark_obstacle(wall)
+    print(f"[OK] Wall marked")
+
+    pathfinder = HierarchicalAStar(grid_map)
+    print(f"  Clusters: {pathfinder.clusters_wide}x{pathfinder.clusters_high}")
+
+    start = (24.0002, 120.0002)
+    end = (24.0018, 120.0002)
+
+    path = pathfinder.find_path(start, end)
+    plain_path = AStarPathfinder(grid_map).find_path(start, end)
+
+    if path and plain_path:
+        print(f"[OK] Path found: {len(path)} points (plain A*: {len(plain_path)} points)")
+    else:
+        print("[FAIL] No path found")
+
+    print()
+
+
 def test_obstacle_manager_integration():
     """Test ObstacleManager integration"""
     print("=" * 50)
-    print("Test 3: ObstacleManager integration test")
+    print("Test 4: ObstacleManager integration test")
     print("=" * 50)
 
     # Create obstacle manager
@@ -132,6 +171,35 @@ def test_obstacle_manager_integration():
     print()
 
 
+def test_mission_sequence_numbers():
+    """Test mission files are numbered 0..N-1 in order"""
+    print("=" * 50)
+    print("Test 5: Mission sequence numbers")
+    print("=" * 50)
+
+    generator = OptimizedWaypointGenerator()
+    params = FlightParameters(altitude=20.0, angle=30.0, spacing=20.0, speed=8.0, yaw_speed=60.0)
+    corners = [
+        (24.001, 120.001),
+        (24.001, 120.004),
+        (24.004, 120.004),
+        (24.004, 120.001)
+    ]
+
+    lines, waypoints = generator.generate_complete_mission(
+        corners, params, region_idx=0, total_regions=2, loiter_time=12.0)
+    qgc_lines = generator.waypoints_to_qgc_format(
+        waypoints, params, region_idx=0, total_regions=2, loiter_time=12.0)
+
+    for name, mission in (("Complete mission", lines), ("QGC format", qgc_lines)):
+        seqs = [int(line.split('\t', 1)[0]) for line in mission[1:]]
+        assert mission[0] == "QGC WPL 110"
+        assert seqs == list(range(len(seqs))), f"{name}: sequence numbers not consecutive"
+        print(f"[OK] {name}: {len(seqs)} commands numbered 0..{len(seqs) - 1}")
+
+    print()
+
+
 def main():
     """Run all tests"""
     print("\n")
@@ -143,7 +211,9 @@ def main():
     try:
         test_astar_basic()
         test_astar_with_obstacle()
+        test_hierarchical_astar()
         test_obstacle_manager_integration()
+        test_mission_sequence_numbers()
 
         print("=" * 50)
         print("[OK] All tests completed!")
@@ -100,6 +100,9 @@ class ModernStyleManager:
 class ModernSlider(tk.Frame):
     """現代化滑桿組件"""
     
+    # 拖動時回呼的最短間隔(毫秒)
+    COMMAND_INTERVAL_MS = 30
+    
     def __init__(self, parent, label="", from_=0, to=100, value=50, 
                  resolution=1, command=None, unit="", **kwargs):
         super().__init__(parent, bg='white', **kwargs)
@@ -144,6 +147,10 @@ class ModernSlider(tk.Frame):
         self.max_val = to
         self.resolution = resolution
         self.current_value = value
+        self._position_after_id = None
+        self._command_after_id = None  # 拖動中合併的回呼排程
+        self._drawn_x = None  # 目前畫面上滑塊的x座標
+        self._drawn_text = None  # 目前值標籤的文字
         
         # 綁定事件
         self.canvas.bind('<Button-1>', self.on_click)
@@ -160,15 +167,20 @@ class ModernSlider(tk.Frame):
         self.update_position()
     
     def on_click(self, event):
-        """點擊設置值"""
+        """點擊設置值（立即回呼）"""
         self.set_value_from_x(event.x)
     
     def on_drag(self, event):
-        """拖動設置值"""
-        self.set_value_from_x(event.x)
+        """拖動設置值（回呼合併，最多每 COMMAND_INTERVAL_MS 一次）"""
+        self.set_value_from_x(event.x, defer=True)
     
-    def set_value_from_x(self, x):
-        """根據x座標設置值"""
+    def set_value_from_x(self, x, defer: bool = False):
+        """
+        根據x座標設置值
+        
+        defer為True時回呼排程到稍後以最新值執行一次，
+        滑鼠移動事件再密集，回呼頻率也不超過約33次/秒。
+        """
         width = self.canvas.winfo_width()
         if width <= 1:
             return
@@ -185,7 +197,17 @@ class ModernSlider(tk.Frame):
             self.current_value = value
             self.update_position()
             if self.command:
-                self.command(value)
+                if not defer:
+                    self._fire_command()
+                elif self._command_after_id is None:
+                    self._command_after_id = self.after(self.COMMAND_INTERVAL_MS, self._fire_command)
+    
+    def _fire_command(self):
+        """以目前值執行回呼（取消尚未執行的排程）"""
+        if self._command_after_id is not None:
+            self.after_cancel(self._command_after_id)
+            self._command_after_id = None
+        self.command(self.current_value)
     
     def update_position(self):
         """更新滑塊位置"""
@@ -197,21 +219,37 @@ class ModernSlider(tk.Frame):
         ratio = (self.current_value - self.min_val) / (self.max_val - self.min_val)
         x = ratio * width
         
-        # 更新填充和滑塊
-        self.canvas.coords(self.fill, 0, 0, x, 6)
-        self.canvas.coords(self.thumb, x-7, -4, x+7, 10)
+        # 更新填充和滑塊（位置未變時不呼叫Tk）
+        if x != self._drawn_x:
+            self._drawn_x = x
+            self.canvas.coords(self.fill, 0, 0, x, 6)
+            self.canvas.coords(self.thumb, x-7, -4, x+7, 10)
         
-        # 更新值標籤
+        # 更新值標籤（文字未變時不呼叫Tk）
         if self.resolution == int(self.resolution):
-            self.value_label.config(text=f"{int(self.current_value)}{self.unit}")
+            text = f"{int(self.current_value)}{self.unit}"
         else:
-            self.value_label.config(text=f"{self.current_value:.1f}{self.unit}")
+            text = f"{self.current_value:.1f}{self.unit}"
+        if text != self._drawn_text:
+            self._drawn_text = text
+            self.value_label.config(text=text)
     
     def get(self):
         """獲取當前值"""
         return self.current_value
     
     def set(self, value):
-        """設置值"""
+        """
+        設置值
+        
+        滑塊重繪排到閒置時執行，連續設定多個滑桿（例如重設全部）時
+        只在最後一起重繪一次。
+        """
         self.current_value = max(self.min_val, min(self.max_val, value))
+        if self._position_after_id is None:
+            self._position_after_id = self.after_idle(self._deferred_update_position)
+    
+    def _deferred_update_position(self):
+        """執行排程中的滑塊重繪"""
+        self._position_after_id = None
         self.update_position()
\ No newline at end of file
@@ -4,12 +4,28 @@
 """
 
 import math
+from itertools import islice
 from typing import List, Tuple, Optional
 
 from config import Config, FlightParameters
 from collision_avoidance import CollisionAvoidanceSystem
 from logger_utils import logger
 
+# 航點與轉向指令的格式樣板（不含序列號；尾段參數先格式化好再代入）
+# 每行只做一次 % 代入，比逐行組合 f-string 少一些位元組碼指令
+_WAYPOINT_COMMAND = "0\t3\t16\t0\t0\t0\t0\t%.6f\t%.6f%s"  # 緯度, 經度, 高度尾段
+_TURN_COMMAND = "0\t3\t115\t%.1f%s"  # 方位角, 轉向速度尾段
+_SPEED_COMMAND = "0\t3\t178\t0\t%.1f\t0\t0\t0\t0\t0\t1"  # 速度(m/s)
+_TAKEOFF_COMMAND = "0\t3\t22\t0\t0\t0\t0\t0\t0\t%.1f\t1"  # TAKEOFF高度
+
+# 與參數無關的固定指令，每次任務直接沿用同一字串
+_HOME_COMMAND = "0\t3\t179\t0\t0\t0\t0\t0\t0\t0\t1"
+_RTL_SLOW_DOWN_COMMAND = _SPEED_COMMAND % 5.0  # 減速至5m/s
+_RTL_COMMAND = "0\t3\t20\t0\t0\t0\t0\t0\t0\t0\t1"
+_FINAL_SPEED_COMMAND = _SPEED_COMMAND % 10.0  # 最後減速
+# 網格掃描任務的最後減速（沿用既有輸出格式，參數欄位多一個0）
+_GRID_FINAL_SPEED_COMMAND = "0\t3\t178\t0\t10.0\t0\t0\t0\t0\t0\t0\t1"
+
 
 # ==============================
 # 優化航點生成器
@@ -17,9 +33,13 @@ from logger_utils import logger
 class OptimizedWaypointGenerator:
     """優化後的航點生成器 - 整合智能避撞和完整任務循環"""
     
+    # 掃描航點快取的最大筆數（超過時整批清除）
+    SCAN_CACHE_SIZE = 64
+    
     def __init__(self):
         self.collision_avoidance = CollisionAvoidanceSystem(Config.SAFETY_DISTANCE_M)
-        self.earth_radius_m = 111111.0
+        # (角點, 角度, 間距, 起始方向) -> 掃描航點
+        self._scan_cache = {}
     
     def generate_complete_mission(self, corners: List[Tuple[float, float]], 
                                  params: FlightParameters, 
@@ -34,43 +54,37 @@ class OptimizedWaypointGenerator:
         3. RTL with 高度錯開
         """
         try:
-            # 生成基本網格航點
-            lines, waypoints = self.generate_grid_waypoints(
-                corners, params, start_from_left)
+            # 生成基本網格航點（不含序列號的指令、不含最後減速，最後一次編號）
+            # LOITER命令（如果需要）在掃描航點前、速度設定後直接產生
+            commands, waypoints = self._grid_commands(
+                corners, params, start_from_left, loiter_time)
             
             if not waypoints:
-                return lines, waypoints
-            
-            # 插入LOITER命令（如果需要）
-            if loiter_time > 0:
-                lines = self.collision_avoidance.insert_loiter_command(
-                    lines, loiter_time, insert_after_line=2)
+                if commands:
+                    commands.append(_GRID_FINAL_SPEED_COMMAND)
+                return self._number_commands(commands), waypoints
             
             # 添加返回起點的航點
             first_waypoint = waypoints[0]
-            return_line = f"{len(lines)-1}\t0\t3\t16\t0\t0\t0\t0\t{first_waypoint[0]:.6f}\t{first_waypoint[1]:.6f}\t{params.altitude:.2f}\t1"
-            lines.insert(-1, return_line)  # 插入在最後減速命令前
             waypoints.append(first_waypoint)
             
             # 計算RTL高度（錯開返航）
             rtl_altitude = self.calculate_rtl_altitude(
                 params.altitude, region_idx, total_regions)
             
-            # 添加RTL命令與高度設定
-            seq = len(lines) - 1
-            lines.insert(-1, f"{seq}\t0\t3\t178\t0\t5.0\t0\t0\t0\t0\t0\t1")  # 減速至5m/s
-            seq += 1
-            lines.insert(-1, f"{seq}\t0\t3\t22\t0\t0\t0\t0\t0\t0\t{rtl_altitude:.1f}\t1")  # TAKEOFF到RTL高度
-            seq += 1
-            lines.insert(-1, f"{seq}\t0\t3\t20\t0\t0\t0\t0\t0\t0\t0\t1")  # RTL命令
+            # 依序接上返回起點、RTL命令與高度設定、最後減速
+            commands.extend((
+                _WAYPOINT_COMMAND % (first_waypoint[0], first_waypoint[1], f"\t{params.altitude:.2f}\t1"),
+                _RTL_SLOW_DOWN_COMMAND,  # 減速至5m/s
+                _TAKEOFF_COMMAND % rtl_altitude,  # TAKEOFF到RTL高度
+                _RTL_COMMAND,  # RTL命令
+                _GRID_FINAL_SPEED_COMMAND,  # 最後減速
+            ))
             
-            # 更新序列號
-            lines = self.update_all_sequence_numbers(lines)
-            
-            return lines, waypoints
+            return self._number_commands(commands), waypoints
             
         except Exception as e:
-            logger.error(f"生成完整任務失敗: {e}")
+            logger.error("生成完整任務失敗: %s", e)
             return ["QGC WPL 110"], []
     
     def calculate_rtl_altitude(self, base_altitude: float, 
@@ -90,102 +104,144 @@ class OptimizedWaypointGenerator:
                               start_from_left: bool = True) -> Tuple[List[str], List[Tuple[float, float]]]:
         """生成網格掃描航點"""
         try:
-            # 座標變換
-            pts_rot, lat0, lon0, cosLat0, cos_t, sin_t = self.project_and_rotate(
-                corners, params.angle)
-            
-            if not pts_rot:
-                return ["QGC WPL 110"], []
-            
-            # 計算掃描線
-            ys = [p[1] for p in pts_rot]
-            minY, maxY = min(ys), max(ys)
-            
-            # 確保完全覆蓋
-            margin = params.spacing * 0.1
-            minY -= margin
-            maxY += margin
-            
-            total_lines = max(1, int(math.ceil((maxY - minY) / params.spacing)) + 1)
-            
-            # 開始生成航點文件
-            lines = ["QGC WPL 110"]
-            seq = 0
-            
-            # HOME點
-            lines.append(f"{seq}\t0\t3\t179\t0\t0\t0\t0\t0\t0\t0\t1")
-            seq += 1
-            
-            # 速度設定
-            lines.append(f"{seq}\t0\t3\t178\t0\t{params.speed:.1f}\t0\t0\t0\t0\t0\t1")
-            seq += 1
-            
-            waypoints = []
-            prev_lat, prev_lon = None, None
-            
-            for li in range(total_lines):
-                y = minY + li * params.spacing
-                if y > maxY:
-                    y = maxY
-                
-                # 計算與多邊形的交點
-                xs = self.intersect_line_polygon(pts_rot, y)
-                
-                if len(xs) < 2:
-                    continue
-                
-                # 確定掃描方向（之字形）
-                go_left_to_right = (li % 2 == 0) if start_from_left else (li % 2 == 1)
-                
-                if go_left_to_right:
-                    line_points = [(xs[0], y), (xs[-1], y)]
-                else:
-                    line_points = [(xs[-1], y), (xs[0], y)]
-                
-                # 轉換回地理座標並生成航點
-                for xr, yr in line_points:
-                    lat, lon = self.rotate_back_to_geographic(
-                        cos_t, sin_t, xr, yr, lat0, lon0, cosLat0)
-                    
-                    waypoints.append((lat, lon))
-                    
-                    # 加入轉向指令（除了第一個點）
-                    if prev_lat is not None:
-                        bearing = self.calculate_bearing(prev_lat, prev_lon, lat, lon)
-                        lines.append(f"{seq}\t0\t3\t115\t{bearing:.1f}\t{params.yaw_speed:.1f}\t0\t0\t0\t0\t0\t1")
-                        seq += 1
-                    
-                    # 加入航點
-                    lines.append(f"{seq}\t0\t3\t16\t0\t0\t0\t0\t{lat:.6f}\t{lon:.6f}\t{params.altitude:.2f}\t1")
-                    seq += 1
-                    
-                    prev_lat, prev_lon = lat, lon
-            
-            # 最後減速
-            lines.append(f"{seq}\t0\t3\t178\t0\t10.0\t0\t0\t0\t0\t0\t0\t1")
-            
-            return lines, waypoints
+            commands, waypoints = self._grid_commands(corners, params, start_from_left)
+            if commands:
+                # 最後減速
+                commands.append(_GRID_FINAL_SPEED_COMMAND)
+            return self._number_commands(commands), waypoints
         
         except Exception as e:
-            logger.error(f"生成航點錯誤: {e}")
+            logger.error("生成航點錯誤: %s", e)
             return ["QGC WPL 110"], []
     
-    def update_all_sequence_numbers(self, lines: List[str]) -> List[str]:
-        """更新所有序列號"""
-        updated_lines = []
-        seq = 0
+    def _grid_commands(self, corners: List[Tuple[float, float]],
+                       params: FlightParameters,
+                       start_from_left: bool,
+                       loiter_time: float = 0.0) -> Tuple[List[str], List[Tuple[float, float]]]:
+        """
+        生成網格掃描的指令（不含序列號與最後減速，由呼叫端依序接上結尾）與航點
+        loiter_time > 0 且有航點時，在速度設定後加入LOITER命令
+        角點投影後為空時返回 ([], [])
+        """
+        waypoints = self._scan_waypoints(corners, params.angle, params.spacing, start_from_left)
+        if waypoints is None:
+            return [], []
+        
+        commands = [
+            _HOME_COMMAND,  # HOME點
+            _SPEED_COMMAND % params.speed,  # 速度設定
+        ]
+        if loiter_time > 0 and waypoints:
+            commands.append(self.collision_avoidance.loiter_command(loiter_time))
+        self._append_waypoint_commands(commands, waypoints, params)
+        
+        return commands, waypoints
+    
+    def _scan_waypoints(self, corners: List[Tuple[float, float]], angle: float,
+                        spacing: float, start_from_left: bool) -> Optional[List[Tuple[float, float]]]:
+        """
+        掃描航點座標（角點投影後為空時返回None）
+        只取決於角點、角度、間距與起始方向，結果快取；只調整速度、高度等參數時
+        不必重新計算幾何。返回新的列表，呼叫端可自由修改。
+        """
+        key = (tuple(map(tuple, corners)), angle, spacing, bool(start_from_left))
+        cached = self._scan_cache.get(key)
+        if cached is not None:
+            return list(cached)
+        
+        # 座標變換
+        pts_rot, lat0, lon0, cosLat0, cos_t, sin_t = self.project_and_rotate(corners, angle)
+        
+        if not pts_rot:
+            return None
+        
+        # 計算掃描線
+        ys = [p[1] for p in pts_rot]
+        minY, maxY = min(ys), max(ys)
+        
+        # 確保完全覆蓋
+        margin = spacing * 0.1
+        minY -= margin
+        maxY += margin
+        
+        # 掃描整個區域，先建立航點座標，再一次輸出航點文件
+        waypoints = self._sweep_waypoints(
+            pts_rot, minY, maxY, spacing, start_from_left,
+            lat0, lon0, cosLat0, cos_t, sin_t)
+        
+        if len(self._scan_cache) >= self.SCAN_CACHE_SIZE:
+            self._scan_cache.clear()
+        self._scan_cache[key] = tuple(waypoints)
+        return waypoints
+    
+    def _sweep_waypoints(self, pts_rot: List[Tuple[float, float]],
+                         minY: float, maxY: float, spacing: float, start_from_left: bool,
+                         lat0: float, lon0: float, cosLat0: float,
+                         cos_t: float, sin_t: float) -> List[Tuple[float, float]]:
+        """
+        之字形掃描整個區域，返回地理座標航點 [(lat, lon), ...]
+        交點、端點選擇、掃描方向與反旋轉都在同一次走訪完成
+        """
+        total_lines = max(1, int(math.ceil((maxY - minY) / spacing)) + 1)
         
-        for line in lines:
-            if line.startswith('#') or line == "QGC WPL 110":
-                updated_lines.append(line)
+        # 所有掃描線的y值與交點一次算好（每條邊只處理其y範圍涵蓋的掃描線）
+        ys = [min(minY + li * spacing, maxY) for li in range(total_lines)]
+        crossings = self._scanline_crossings(
+            self._build_edge_table(pts_rot), ys, minY, spacing)
+        
+        # 反旋轉與反投影的常數在迴圈外算好（同 rotate_back_to_geographic）
+        waypoints = []
+        append = waypoints.append
+        earth_radius_m = Config.EARTH_RADIUS_M
+        lon_scale = earth_radius_m * cosLat0
+        neg_sin_t = -sin_t
+        # 由左至右掃描的掃描線奇偶性（之字形）
+        left_to_right_parity = 0 if start_from_left else 1
+        
+        for li, xs in enumerate(crossings):
+            if len(xs) < 2:
+                continue
+            xs.sort()
+            
+            # 確定掃描方向
+            if li % 2 == left_to_right_parity:
+                x_first, x_second = xs[0], xs[-1]
             else:
-                parts = line.split('\t')
-                if len(parts) > 0:
-                    parts[0] = str(seq)
-                    updated_lines.append('\t'.join(parts))
-                    seq += 1
+                x_first, x_second = xs[-1], xs[0]
+            
+            # 同一掃描線上兩端點共用y的旋轉分量
+            y = ys[li]
+            sin_y = sin_t * y
+            cos_y = cos_t * y
+            append(((neg_sin_t * x_first + cos_y) / earth_radius_m + lat0,
+                    (cos_t * x_first + sin_y) / lon_scale + lon0))
+            append(((neg_sin_t * x_second + cos_y) / earth_radius_m + lat0,
+                    (cos_t * x_second + sin_y) / lon_scale + lon0))
         
-        return updated_lines
+        return waypoints
+    
+    def _append_waypoint_commands(self, commands: List[str],
+                                  waypoints: List[Tuple[float, float]],
+                                  params: FlightParameters):
+        """加入航點指令（不含序列號），第一個以外的航點前加入轉向指令"""
+        # 每行固定的尾段只格式化一次
+        yaw_suffix = f"\t{params.yaw_speed:.1f}\t0\t0\t0\t0\t0\t1"
+        alt_suffix = f"\t{params.altitude:.2f}\t1"
+        # 方位角整批先算好（第i項為第i到第i+1個航點）
+        bearings = self.calculate_bearings(waypoints)
+        append = commands.append
+        
+        for i, (lat, lon) in enumerate(waypoints):
+            if i:
+                append(_TURN_COMMAND % (bearings[i - 1], yaw_suffix))
+            append(_WAYPOINT_COMMAND % (lat, lon, alt_suffix))
+    
+    @staticmethod
+    def _number_commands(commands: List[str]) -> List[str]:
+        """加上檔頭並依順序為指令編上序列號（從0起連續）"""
+        lines = ["QGC WPL 110"]
+        lines.extend([f"{seq}\t{command}" for seq, command in enumerate(commands)])
+        return lines
     
     def calculate_bearing(self, lat1: float, lon1: float, 
                         lat2: float, lon2: float) -> float:
@@ -200,46 +256,100 @@ class OptimizedWaypointGenerator:
         bearing = math.degrees(math.atan2(x, y))
         return (bearing + 360) % 360
     
+    def calculate_bearings(self, waypoints: List[Tuple[float, float]]) -> List[float]:
+        """
+        批次計算相鄰航點間的方位角
+        返回長度為len(waypoints)-1的列表，第i項等於calculate_bearing(waypoints[i], waypoints[i+1])
+        """
+        sin, cos, atan2 = math.sin, math.cos, math.atan2
+        radians, degrees = math.radians, math.degrees
+        bearings = []
+        if len(waypoints) < 2:
+            return bearings
+        
+        # 每個航點的緯度三角函數只算一次，作為終點後再沿用為下一段的起點
+        lat1, lon1 = waypoints[0]
+        lat1_rad = radians(lat1)
+        sin_lat1, cos_lat1 = sin(lat1_rad), cos(lat1_rad)
+        
+        for lat2, lon2 in islice(waypoints, 1, None):
+            dLon = radians(lon2 - lon1)
+            lat2_rad = radians(lat2)
+            sin_lat2, cos_lat2 = sin(lat2_rad), cos(lat2_rad)
+            
+            x = sin(dLon) * cos_lat2
+            y = cos_lat1 * sin_lat2 - sin_lat1 * cos_lat2 * cos(dLon)
+            bearings.append((degrees(atan2(x, y)) + 360) % 360)
+            
+            lon1, sin_lat1, cos_lat1 = lon2, sin_lat2, cos_lat2
+        
+        return bearings
+    
     def project_and_rotate(self, corners: List[Tuple[float, float]], angle_deg: float):
         """投影和旋轉座標系"""
-        # 計算中心點
-        lat0 = sum(p[0] for p in corners) / len(corners)
-        lon0 = sum(p[1] for p in corners) / len(corners)
+        # 計算中心點（拆成緯度、經度欄位後逐欄加總）
+        lats, lons = zip(*corners)
+        n = len(corners)
+        lat0 = sum(lats) / n
+        lon0 = sum(lons) / n
         cosLat0 = math.cos(math.radians(lat0))
         
         # 旋轉角度
         theta = math.radians(angle_deg)
         cos_t, sin_t = math.cos(theta), math.sin(theta)
         
-        # 投影並旋轉每個點
-        pts_rot = []
-        for lat, lon in corners:
-            x = (lon - lon0) * Config.EARTH_RADIUS_M * cosLat0
-            y = (lat - lat0) * Config.EARTH_RADIUS_M
-            
-            xr = cos_t * x - sin_t * y
-            yr = sin_t * x + cos_t * y
-            pts_rot.append((xr, yr))
+        # 投影並旋轉每個點：常數綁為區域變數，單一推導式完成（運算順序與逐點計算相同）
+        R = Config.EARTH_RADIUS_M
+        pts_rot = [(cos_t * x - sin_t * y, sin_t * x + cos_t * y)
+                   for x, y in (((lon - lon0) * R * cosLat0, (lat - lat0) * R)
+                                for lat, lon in corners)]
         
         return pts_rot, lat0, lon0, cosLat0, cos_t, sin_t
     
     def intersect_line_polygon(self, pts: List[Tuple[float, float]], y: float) -> List[float]:
         """計算水平線與多邊形的交點"""
-        xs = []
-        n = len(pts)
+        return self._intersect_edges(self._build_edge_table(pts), y)
+    
+    @staticmethod
+    def _build_edge_table(pts: List[Tuple[float, float]]) -> List[Tuple[float, float, float, float, float, float]]:
+        """
+        建立多邊形邊表：(起點x, 起點y, y下界, y上界, dx, dy)
+        水平邊（|dy| <= 1e-10）不會產生交點，建表時即排除
+        """
+        return [(x1, y1, min(y1, y2), max(y1, y2), x2 - x1, y2 - y1)
+                for (x1, y1), (x2, y2) in zip(pts, pts[1:] + pts[:1])
+                if abs(y2 - y1) > 1e-10]
+    
+    @staticmethod
+    def _scanline_crossings(edges, ys: List[float], minY: float, spacing: float) -> List[List[float]]:
+        """
+        一次計算所有掃描線與多邊形的交點（各掃描線的交點依邊表順序，未排序）
+        ys 為由 minY 起以 spacing 遞增（最後一條可能被截到上界）的掃描線y值；
+        每條邊只走訪其y範圍涵蓋的掃描線，不必每條掃描線都走訪全部的邊
+        """
+        crossings = [[] for _ in ys]
+        last = len(ys) - 1
+        floor, ceil = math.floor, math.ceil
         
-        for i in range(n):
-            x1, y1 = pts[i]
-            x2, y2 = pts[(i + 1) % n]
-            
-            # 檢查線段是否與水平線相交
-            if (y1 <= y <= y2) or (y2 <= y <= y1):
-                if abs(y2 - y1) > 1e-10:
-                    t = (y - y1) / (y2 - y1)
-                    x_intersect = x1 + t * (x2 - x1)
-                    xs.append(x_intersect)
+        for x1, y1, lo, hi, dx, dy in edges:
+            # 以除法估計涵蓋的掃描線範圍並放寬，實際是否相交仍以原條件判斷
+            first = max(0, int(floor((lo - minY) / spacing)) - 1)
+            stop = min(last, int(ceil((hi - minY) / spacing)) + 2)
+            for li in range(first, stop + 1):
+                y = ys[li]
+                if lo <= y <= hi:
+                    crossings[li].append(x1 + (y - y1) / dy * dx)
         
-        return sorted(xs)
+        return crossings
+    
+    @staticmethod
+    def _intersect_edges(edges, y: float) -> List[float]:
+        """以預先建立的邊表計算水平線與多邊形的交點（由小到大）"""
+        xs = [x1 + (y - y1) / dy * dx
+              for x1, y1, lo, hi, dx, dy in edges
+              if lo <= y <= hi]
+        xs.sort()
+        return xs
     
     def rotate_back_to_geographic(self, cos_t: float, sin_t: float, xr: float, yr: float,
                                 lat0: float, lon0: float, cosLat0: float) -> Tuple[float, float]:
@@ -249,8 +359,9 @@ class OptimizedWaypointGenerator:
         y = -sin_t * xr + cos_t * yr
 
         # 反投影到地理座標
-        lat = y / Config.EARTH_RADIUS_M + lat0
-        lon = x / (Config.EARTH_RADIUS_M * cosLat0) + lon0
+        R = Config.EARTH_RADIUS_M
+        lat = y / R + lat0
+        lon = x / (R * cosLat0) + lon0
 
         return lat, lon
 
@@ -276,55 +387,29 @@ class OptimizedWaypointGenerator:
         if not waypoints:
             return ["QGC WPL 110"]
 
-        lines = ["QGC WPL 110"]
-        seq = 0
-
-        # HOME點
-        lines.append(f"{seq}\t0\t3\t179\t0\t0\t0\t0\t0\t0\t0\t1")
-        seq += 1
-
-        # 速度設定
-        lines.append(f"{seq}\t0\t3\t178\t0\t{params.speed:.1f}\t0\t0\t0\t0\t0\t1")
-        seq += 1
+        # 先收集不含序列號的指令，最後一次編號，不必再重新解析整份文件
+        commands = [
+            _HOME_COMMAND,  # HOME點
+            _SPEED_COMMAND % params.speed,  # 速度設定
+        ]
 
-        # 插入LOITER命令（如果需要）
+        # 插入LOITER命令（如果需要），位於速度設定之後
         if loiter_time > 0:
-            lines = self.collision_avoidance.insert_loiter_command(
-                lines, loiter_time, insert_after_line=2)
-            seq = len([l for l in lines if not l.startswith('#') and l != "QGC WPL 110"])
+            commands.append(self.collision_avoidance.loiter_command(loiter_time))
 
         # 添加航點（帶轉向指令）
         # 注意：waypoints 已經包含所有航點，包括返回起點的航點
-        prev_lat, prev_lon = None, None
-
-        for lat, lon in waypoints:
-            # 加入轉向指令（除了第一個點）
-            if prev_lat is not None:
-                bearing = self.calculate_bearing(prev_lat, prev_lon, lat, lon)
-                lines.append(f"{seq}\t0\t3\t115\t{bearing:.1f}\t{params.yaw_speed:.1f}\t0\t0\t0\t0\t0\t1")
-                seq += 1
-
-            # 加入航點
-            lines.append(f"{seq}\t0\t3\t16\t0\t0\t0\t0\t{lat:.6f}\t{lon:.6f}\t{params.altitude:.2f}\t1")
-            seq += 1
-
-            prev_lat, prev_lon = lat, lon
+        self._append_waypoint_commands(commands, waypoints, params)
 
         # 計算RTL高度（錯開返航）
         rtl_altitude = self.calculate_rtl_altitude(params.altitude, region_idx, total_regions)
 
         # 添加RTL命令與高度設定
-        lines.append(f"{seq}\t0\t3\t178\t0\t5.0\t0\t0\t0\t0\t0\t1")  # 減速至5m/s
-        seq += 1
-        lines.append(f"{seq}\t0\t3\t22\t0\t0\t0\t0\t0\t0\t{rtl_altitude:.1f}\t1")  # TAKEOFF到RTL高度
-        seq += 1
-        lines.append(f"{seq}\t0\t3\t20\t0\t0\t0\t0\t0\t0\t0\t1")  # RTL命令
-        seq += 1
+        commands.append(_RTL_SLOW_DOWN_COMMAND)  # 減速至5m/s
+        commands.append(_TAKEOFF_COMMAND % rtl_altitude)  # TAKEOFF到RTL高度
+        commands.append(_RTL_COMMAND)  # RTL命令
 
         # 最後減速
-        lines.append(f"{seq}\t0\t3\t178\t0\t10.0\t0\t0\t0\t0\t0\t1")
-
-        # 更新序列號
-        lines = self.update_all_sequence_numbers(lines)
+        commands.append(_FINAL_SPEED_COMMAND)
 
-        return lines
\ No newline at end of file
+        return self._number_commands(commands)
\ No newline at end of file